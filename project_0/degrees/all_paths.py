@@ -0,0 +1,210 @@
+"""
+Every shortest connection between two people in the co-star graph.
+
+A breadth-first search from the source records, for every person up
+to the target's layer, all (movie, person) links from the previous
+layer. The links form a DAG of shortest paths that is walked lazily,
+so even millions of equal-length paths are never held in memory.
+"""
+
+import heapq
+
+
+class ShortestPaths():
+    """
+    DAG of all shortest paths between two person indices of a Graph.
+    """
+
+    def __init__(self, graph, source, target):
+        self.graph = graph
+        self.source = source
+        self.target = target
+
+        # Maps a person to the (movie, person) links from the layer before
+        self.predecessors = {source: []}
+        self.distance = None
+        self.build()
+
+    def build(self):
+        graph = self.graph
+        person_offsets = graph.person_offsets
+        person_movies = graph.person_movies
+        movie_offsets = graph.movie_offsets
+        movie_people = graph.movie_people
+        predecessors = self.predecessors
+
+        if self.source == self.target:
+            self.distance = 0
+            return
+
+        frontier = [self.source]
+        distance = 0
+        while frontier:
+            distance += 1
+            layer = {}
+            for person in frontier:
+                for i in range(person_offsets[person],
+                               person_offsets[person + 1]):
+                    movie = person_movies[i]
+                    for j in range(movie_offsets[movie],
+                                   movie_offsets[movie + 1]):
+                        neighbor = movie_people[j]
+                        if neighbor in predecessors:
+                            continue
+                        layer.setdefault(neighbor, []).append((movie, person))
+            predecessors.update(layer)
+
+            # Stop once the whole layer of the target is known
+            if self.target in layer:
+                self.distance = distance
+                return
+            frontier = list(layer)
+
+    def count(self):
+        """Returns the number of shortest paths without listing them."""
+        if self.distance is None:
+            return 0
+        counts = {self.source: 1}
+
+        def paths_to(person):
+            if person not in counts:
+                counts[person] = sum(paths_to(parent) for _, parent
+                                     in self.predecessors[person])
+            return counts[person]
+
+        # Fill counts layer by layer so the recursion stays shallow
+        for person in self.predecessors:
+            paths_to(person)
+        return counts[self.target]
+
+    def __iter__(self):
+        """
+        Yields every shortest path as a list of (movie, person) index
+        pairs, walking the DAG back from the target depth first.
+        """
+        if self.distance is None:
+            return
+        if self.distance == 0:
+            yield []
+            return
+        predecessors = self.predecessors
+        suffix = []
+        stack = [iter(predecessors[self.target])]
+        person = self.target
+        people = [person]
+        while stack:
+            link = next(stack[-1], None)
+            if link is None:
+                stack.pop()
+                people.pop()
+                if suffix:
+                    suffix.pop()
+                continue
+            movie, parent = link
+            suffix.append((movie, people[-1]))
+            if parent == self.source:
+                yield suffix[::-1]
+                suffix.pop()
+                continue
+            people.append(parent)
+            stack.append(iter(predecessors[parent]))
+
+    def best(self, k, cost):
+        """
+        Yields up to k shortest paths in increasing total cost, where
+        cost(movie) is the cost of using a movie as a link.
+
+        The cheapest cost from the source to every person is computed
+        first, so a best-first walk back from the target pops the
+        paths in order and only keeps its open partial paths.
+        """
+        if self.distance is None or k <= 0:
+            return
+        if self.distance == 0:
+            yield []
+            return
+
+        # Cheapest cost from the source to every person in the DAG
+        cheapest = {self.source: 0}
+        for person, links in self.predecessors.items():
+            if person != self.source:
+                cheapest[person] = min(cheapest[parent] + cost(movie)
+                                       for movie, parent in links)
+
+        # Entries are (total bound, tie breaker, cost so far, person, path)
+        counter = 0
+        queue = [(cheapest[self.target], counter, 0, self.target, None)]
+        found = 0
+        while queue and found < k:
+            _, _, spent, person, suffix = heapq.heappop(queue)
+            if person == self.source:
+                found += 1
+                yield unwind(suffix)
+                continue
+            for movie, parent in self.predecessors[person]:
+                counter += 1
+                total = spent + cost(movie)
+                heapq.heappush(queue, (total + cheapest[parent], counter,
+                                       total, parent,
+                                       ((movie, person), suffix)))
+
+
+def unwind(suffix):
+    """Turns a linked list of (movie, person) links into a path."""
+    path = []
+    while suffix is not None:
+        link, suffix = suffix
+        path.append(link)
+    return path
+
+
+def newest_movies(graph):
+    """Returns a cost preferring the most recent movies."""
+    def cost(movie):
+        return -year(graph.movie_years[movie])
+    return cost
+
+
+def oldest_movies(graph):
+    """Returns a cost preferring the earliest movies."""
+    def cost(movie):
+        return year(graph.movie_years[movie])
+    return cost
+
+
+def popular_movies(graph):
+    """Returns a cost preferring movies with the most stars."""
+    offsets = graph.movie_offsets
+
+    def cost(movie):
+        return offsets[movie] - offsets[movie + 1]
+    return cost
+
+
+def year(value):
+    try:
+        return int(value)
+    except ValueError:
+        return 0
+
+
+def all_shortest_paths(graph, source, target):
+    """
+    Yields every shortest list of (movie_id, person_id) pairs
+    that connect the source to the target IMDb ids.
+    """
+    paths = ShortestPaths(graph, graph.person_index[source],
+                          graph.person_index[target])
+    for path in paths:
+        yield graph.path_ids(path)
+
+
+def best_shortest_paths(graph, source, target, k, cost_for=popular_movies):
+    """
+    Returns up to k shortest lists of (movie_id, person_id) pairs
+    between two IMDb ids, cheapest first by the cost that cost_for
+    makes for the graph.
+    """
+    paths = ShortestPaths(graph, graph.person_index[source],
+                          graph.person_index[target])
+    return [graph.path_ids(path) for path in paths.best(k, cost_for(graph))]
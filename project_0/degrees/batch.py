@@ -0,0 +1,207 @@
+"""
+Non-interactive query modes for degrees of separation.
+
+Queries are lines holding two names separated by a tab, or JSON
+objects with "source" and "target" names. Every answer is written
+as one JSON line.
+"""
+
+import gc
+import json
+import multiprocessing
+import os
+import signal
+import socket
+import socketserver
+import stat
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+
+from landmarks import Landmarks
+from snapshot import open_graph
+
+# Number of queries handed to the process pool at a time
+BLOCK_SIZE = 10000
+
+# Graph of the current worker process
+worker_graph = None
+
+
+def parse_query(line):
+    """
+    Returns the (source, target) names of a query line.
+    Raises ValueError or KeyError if it is malformed.
+    """
+    line = line.strip()
+    if line.startswith("{"):
+        query = json.loads(line)
+        source, target = query["source"], query["target"]
+    else:
+        source, target = line.split("\t")
+    if not isinstance(source, str) or not isinstance(target, str):
+        raise ValueError("names must be strings")
+    return source.strip(), target.strip()
+
+
+def resolve(graph, name):
+    """
+    Returns (person_id, error) for a name, without asking
+    for help when it is unknown or ambiguous.
+    """
+    person_ids = graph.person_ids_for_name(name)
+    if len(person_ids) == 0:
+        return None, {"error": "person not found", "name": name}
+    if len(person_ids) > 1:
+        return None, {"error": "ambiguous name", "name": name,
+                      "candidates": sorted(person_ids)}
+    return person_ids[0], None
+
+
+def answer(graph, line):
+    """Returns the JSON encoded answer to a query line."""
+    try:
+        source_name, target_name = parse_query(line)
+    except (ValueError, KeyError):
+        return json.dumps({"error": "malformed query", "query": line.strip()})
+
+    result = {"source": source_name, "target": target_name}
+    source, error = resolve(graph, source_name)
+    if error is None:
+        target, error = resolve(graph, target_name)
+    if error is not None:
+        result.update(error)
+        return json.dumps(result)
+
+    path = graph.shortest_path(source, target)
+    if path is None:
+        result["degrees"] = None
+        result["path"] = None
+    else:
+        result["degrees"] = len(path)
+        result["path"] = [{"movie_id": movie_id, "person_id": person_id}
+                          for movie_id, person_id in path]
+    return json.dumps(result)
+
+
+def open_batch_graph(directory, landmarks, workers=None):
+    """Opens the graph with the given number of landmarks."""
+    graph = open_graph(directory, workers)
+    if landmarks:
+        graph.landmarks = Landmarks(graph, landmarks)
+    return graph
+
+
+def init_worker(directory, landmarks):
+    """Opens the graph in a worker that did not inherit it."""
+    global worker_graph
+    worker_graph = open_batch_graph(directory, landmarks)
+
+
+def answer_in_worker(line):
+    return answer(worker_graph, line)
+
+
+def run_batch(directory, queries, output, workers=None, landmarks=0):
+    """
+    Answers every non-empty query line from the queries stream,
+    in order, with a pool of worker processes, searching with the
+    given number of landmarks.
+
+    The graph is loaded once, here, and forked workers inherit it:
+    the mapped arrays share the snapshot pages and the tables and
+    id lookups are shared copy-on-write. Where processes cannot be
+    forked, every worker opens the snapshot itself.
+    """
+    global worker_graph
+    workers = workers or os.cpu_count() or 1
+    if "fork" in multiprocessing.get_all_start_methods():
+        worker_graph = open_batch_graph(directory, landmarks, workers)
+        context = multiprocessing.get_context("fork")
+        pool = ProcessPoolExecutor(max_workers=workers, mp_context=context)
+    else:
+        pool = ProcessPoolExecutor(max_workers=workers,
+                                   initializer=init_worker,
+                                   initargs=(directory, landmarks))
+
+    # Keep the collector from writing to the objects the workers inherit
+    gc.freeze()
+    lines = (line for line in queries if line.strip())
+    try:
+        with pool as executor:
+            while True:
+                block = list(islice(lines, BLOCK_SIZE))
+                if not block:
+                    break
+                chunksize = max(1, len(block) // (4 * workers))
+                for result in executor.map(answer_in_worker, block,
+                                           chunksize=chunksize):
+                    output.write(result + "\n")
+    finally:
+        worker_graph = None
+        gc.unfreeze()
+    output.flush()
+
+def serve(graph, queries=sys.stdin, output=sys.stdout):
+    """Answers query lines one at a time until the stream ends."""
+    for line in queries:
+        if not line.strip():
+            continue
+        output.write(answer(graph, line) + "\n")
+        output.flush()
+
+
+def remove_stale_socket(path):
+    """
+    Removes a socket file left behind by a server that is gone.
+    Raises OSError if a server still answers at the path or it
+    is not a socket.
+    """
+    try:
+        mode = os.stat(path).st_mode
+    except FileNotFoundError:
+        return
+    if not stat.S_ISSOCK(mode):
+        raise OSError(f"{path} exists and is not a socket")
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as client:
+        try:
+            client.connect(path)
+        except ConnectionRefusedError:
+            os.unlink(path)
+            return
+    raise OSError(f"a server is already listening at {path}")
+
+
+def interrupt(signum, frame):
+    raise KeyboardInterrupt
+
+
+def serve_socket(graph, path):
+    """
+    Answers query lines sent over a Unix socket at the given path,
+    one connection per thread, until interrupted or terminated.
+    """
+
+    class QueryHandler(socketserver.StreamRequestHandler):
+        def handle(self):
+            for line in self.rfile:
+                line = line.decode("utf-8")
+                if not line.strip():
+                    continue
+                result = answer(graph, line) + "\n"
+                self.wfile.write(result.encode("utf-8"))
+                self.wfile.flush()
+
+    remove_stale_socket(path)
+    with socketserver.ThreadingUnixStreamServer(path, QueryHandler) as server:
+        server.daemon_threads = True
+
+        # Stop on SIGTERM the same way as on Ctrl-C, removing the socket
+        previous = signal.signal(signal.SIGTERM, interrupt)
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            signal.signal(signal.SIGTERM, previous)
+            os.unlink(path)
@@ -0,0 +1,205 @@
+"""
+Benchmarks for the degrees search on synthetic co-star graphs.
+
+Usage: python benchmark.py [edges]
+"""
+
+import random
+import sys
+import time
+
+import degrees
+from graph import Graph
+from landmarks import Landmarks
+from util import Node
+
+# Stars per synthetic movie
+CAST_SIZE = 4
+
+# Largest graph the list-based frontier is still timed on
+LEGACY_LIMIT = 20_000
+
+# Landmarks and random person pairs of the A* comparison
+LANDMARKS = 8
+PAIRS = 100
+
+
+class LegacyQueueFrontier():
+    """List-based frontier with linear scans, kept for comparison."""
+
+    def __init__(self):
+        self.frontier = []
+
+    def add(self, node):
+        self.frontier.append(node)
+
+    def contains_state(self, state):
+        return any(node.state == state for node in self.frontier)
+
+    def empty(self):
+        return len(self.frontier) == 0
+
+    def remove(self):
+        node = self.frontier[0]
+        self.frontier = self.frontier[1:]
+        return node
+
+
+def legacy_search(source, target):
+    """
+    Breadth-first search as it was written before the frontier
+    kept a state index, explored set holding Node objects.
+    """
+    frontier = LegacyQueueFrontier()
+    frontier.add(Node(source, None, None))
+    explored = set()
+    while not frontier.empty():
+        node = frontier.remove()
+        explored.add(node)
+        for movie_id, person_id in degrees.neighbors_for_person(node.state):
+            if person_id == target:
+                return True
+            if not frontier.contains_state(person_id) and \
+                    not any(node.state == person_id for node in explored):
+                frontier.add(Node(person_id, node, movie_id))
+    return None
+
+
+def build_graph(edges, seed=0):
+    """
+    Fills the degrees module with a random graph of the given
+    number of (person, movie) star edges.
+    """
+    rng = random.Random(seed)
+    degrees.names.clear()
+    degrees.people.clear()
+    degrees.movies.clear()
+
+    people_count = max(edges // 5, CAST_SIZE)
+    for i in range(people_count):
+        degrees.people[str(i)] = {"name": f"p{i}", "birth": "",
+                                  "movies": set()}
+
+    for i in range(edges // CAST_SIZE):
+        movie_id = f"m{i}"
+        stars = {str(rng.randrange(people_count)) for _ in range(CAST_SIZE)}
+        degrees.movies[movie_id] = {"title": movie_id, "year": "",
+                                    "stars": stars}
+        for person_id in stars:
+            degrees.people[person_id]["movies"].add(movie_id)
+
+    # Add an isolated person so every search explores the whole component
+    degrees.people["missing"] = {"name": "missing", "birth": "",
+                                 "movies": set()}
+    return "0", "missing"
+
+
+def build_compact_graph():
+    """Returns a compact Graph of the people and movies in degrees."""
+    graph = Graph()
+    for person_id, person in degrees.people.items():
+        graph.add_person(person_id, person["name"], person["birth"])
+    person_column, movie_column = [], []
+    for movie_id, movie in degrees.movies.items():
+        movie = graph.add_movie(movie_id, movie["title"], movie["year"])
+        for person_id in degrees.movies[movie_id]["stars"]:
+            person_column.append(graph.person_index[person_id])
+            movie_column.append(movie)
+    graph.add_stars(person_column, movie_column)
+    return graph
+
+
+def bfs_expansions(graph, source, target):
+    """Returns the people expanded by plain BFS before the target."""
+    seen = {source}
+    frontier = [source]
+    expanded = 0
+    while frontier:
+        next_frontier = []
+        for person in frontier:
+            expanded += 1
+            for _, neighbor in graph.neighbors(person):
+                if neighbor == target:
+                    return expanded
+                if neighbor not in seen:
+                    seen.add(neighbor)
+                    next_frontier.append(neighbor)
+        frontier = next_frontier
+    return expanded
+
+
+def compare_landmarks(seed=1):
+    """
+    Prints the people expanded per query and the time taken by plain
+    BFS, the bidirectional search of the graph with and without
+    landmark bounds, and landmark A* over random pairs of the
+    synthetic graph.
+    """
+    graph = build_compact_graph()
+    start = time.perf_counter()
+    landmarks = Landmarks(graph, LANDMARKS)
+    seconds = time.perf_counter() - start
+    print(f"{LANDMARKS} landmarks computed in {seconds:.2f}s")
+
+    def plain_bfs(source, target, stats):
+        stats["expanded"] = bfs_expansions(graph, source, target)
+
+    def bidirectional(source, target, stats):
+        graph.landmarks = None
+        graph.search(source, target, stats)
+
+    def bounded(source, target, stats):
+        graph.landmarks = landmarks
+        graph.search(source, target, stats)
+
+    searches = [("Plain BFS", plain_bfs),
+                ("Bidirectional BFS", bidirectional),
+                ("Bidirectional with bounds", bounded),
+                ("Landmark A*", landmarks.search)]
+
+    rng = random.Random(seed)
+    people = len(graph.person_ids) - 1
+    pairs = [(rng.randrange(people), rng.randrange(people))
+             for _ in range(PAIRS)]
+    for name, search in searches:
+        expanded = 0
+        start = time.perf_counter()
+        for source, target in pairs:
+            stats = {}
+            search(source, target, stats)
+            expanded += stats["expanded"]
+        seconds = time.perf_counter() - start
+        print(f"{name + ':':<27}{expanded / PAIRS:9.0f} people expanded "
+              f"per query, {seconds:.2f}s for {PAIRS} queries")
+    graph.landmarks = None
+
+
+def timed(function, *args):
+    start = time.perf_counter()
+    function(*args)
+    return time.perf_counter() - start
+
+
+def main():
+    if len(sys.argv) > 2:
+        sys.exit("Usage: python benchmark.py [edges]")
+    edges = int(sys.argv[1]) if len(sys.argv) == 2 else 1_000_000
+
+    print(f"Building graph with {edges} edges...")
+    source, target = build_graph(edges)
+
+    seconds = timed(degrees.shortest_path, source, target)
+    print(f"Queue frontier with state index: {seconds:.2f}s")
+
+    if edges <= LEGACY_LIMIT:
+        seconds = timed(legacy_search, source, target)
+        print(f"List frontier with linear scans: {seconds:.2f}s")
+    else:
+        print(f"List frontier skipped above {LEGACY_LIMIT} edges, "
+              f"run with a smaller graph to compare.")
+
+    compare_landmarks()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,166 @@
+"""
+Single-source breadth-first trees over the compact co-star graph.
+
+One BFS from a source person answers the shortest path from that
+person to everybody else, so queries sharing a source, like
+everyone's Bacon number, only search the graph once.
+"""
+
+from array import array
+from collections import OrderedDict
+
+from graph import INDEX_TYPE
+
+# Distance of people not connected to the source
+UNREACHED = -1
+
+
+class BFSTree():
+    """
+    Predecessor tree of a full breadth-first search from one person.
+    """
+
+    def __init__(self, graph, source):
+        self.graph = graph
+        self.source = source
+        size = len(graph.person_ids)
+
+        # Movie and person every reached person was first reached from
+        self.parent_movie = array(INDEX_TYPE, [UNREACHED]) * size
+        self.parent_person = array(INDEX_TYPE, [UNREACHED]) * size
+        self.distances = array("h", [UNREACHED]) * size
+        self.histogram = None
+
+        self.build()
+
+    def build(self):
+        graph = self.graph
+        person_offsets = graph.person_offsets
+        person_movies = graph.person_movies
+        movie_offsets = graph.movie_offsets
+        movie_people = graph.movie_people
+        parent_movie = self.parent_movie
+        parent_person = self.parent_person
+        distances = self.distances
+
+        distances[self.source] = 0
+        frontier = [self.source]
+        distance = 0
+        while frontier:
+            distance += 1
+            next_frontier = []
+            for person in frontier:
+                for i in range(person_offsets[person],
+                               person_offsets[person + 1]):
+                    movie = person_movies[i]
+                    for j in range(movie_offsets[movie],
+                                   movie_offsets[movie + 1]):
+                        neighbor = movie_people[j]
+                        if distances[neighbor] != UNREACHED:
+                            continue
+                        distances[neighbor] = distance
+                        parent_movie[neighbor] = movie
+                        parent_person[neighbor] = person
+                        next_frontier.append(neighbor)
+            frontier = next_frontier
+
+    def distance(self, target):
+        """Returns the degrees to the target index, or None."""
+        distance = self.distances[target]
+        return None if distance == UNREACHED else distance
+
+    def path(self, target):
+        """
+        Returns the (movie, person) index pairs from the source
+        to the target by walking the parent links, or None.
+        """
+        if self.distances[target] == UNREACHED:
+            return None
+        path = []
+        person = target
+        while person != self.source:
+            path.append((self.parent_movie[person], person))
+            person = self.parent_person[person]
+        path.reverse()
+        return path
+
+    def distance_histogram(self):
+        """
+        Returns a dict mapping every distance to the number of people
+        at that distance from the source, None for people not reached.
+        """
+        if self.histogram is None:
+            counts = {}
+            for distance in self.distances:
+                counts[distance] = counts.get(distance, 0) + 1
+            self.histogram = {
+                (None if distance == UNREACHED else distance): count
+                for distance, count in sorted(counts.items())
+            }
+        return self.histogram
+
+
+class TreeCache():
+    """
+    Least recently used cache of BFS trees keyed by source person.
+    """
+
+    def __init__(self, graph, capacity=8):
+        self.graph = graph
+        self.capacity = capacity
+        self.trees = OrderedDict()
+
+    def tree(self, source):
+        """Returns the BFS tree of a source index, building it if needed."""
+        tree = self.trees.get(source)
+        if tree is not None:
+            self.trees.move_to_end(source)
+            return tree
+        tree = BFSTree(self.graph, source)
+        self.trees[source] = tree
+        if len(self.trees) > self.capacity:
+            self.trees.popitem(last=False)
+        return tree
+
+    def search(self, source, target):
+        """
+        Returns the (movie, person) index path from the source to the
+        target, reusing a cached tree of the target when there is one.
+        """
+        if source not in self.trees and target in self.trees:
+            path = self.tree(target).path(source)
+            return None if path is None else reverse_path(target, path)
+        return self.tree(source).path(target)
+
+    def shortest_path(self, source, target):
+        """
+        Returns the shortest list of (movie_id, person_id) pairs
+        that connect the source to the target IMDb ids.
+
+        If no possible path, returns None.
+        """
+        graph = self.graph
+        path = self.search(graph.person_index[source],
+                           graph.person_index[target])
+        if path is None:
+            return None
+        return [(graph.movie_ids[movie], graph.person_ids[person])
+                for movie, person in path]
+
+    def distance_histogram(self, source):
+        """
+        Returns {degrees: number of people} for a source IMDb id,
+        with None counting the people not connected to the source.
+        """
+        source = self.graph.person_index[source]
+        return self.tree(source).distance_histogram()
+
+
+def reverse_path(start, path):
+    """
+    Reverses a (movie, person) path that leads away from start,
+    so that it leads from its last person back to start.
+    """
+    people = [start] + [person for _, person in path]
+    movies = [movie for movie, _ in path]
+    return [(movies[i], people[i]) for i in reversed(range(len(path)))]
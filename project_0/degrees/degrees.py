@@ -1,6 +1,12 @@
+import argparse
+import contextlib
 import csv
 import sys
 
+from batch import run_batch, serve, serve_socket
+from landmarks import Landmarks
+from loader import load_filtered_graph
+from snapshot import open_graph
 from util import Node, StackFrontier, QueueFrontier
 
 # Maps names to a set of corresponding person_ids
@@ -52,24 +58,95 @@ def load_data(directory):
                 pass
 
 
-def main():
-    if len(sys.argv) > 2:
-        sys.exit("Usage: python degrees.py [directory]")
-    directory = sys.argv[1] if len(sys.argv) == 2 else "large"
+def parse_arguments():
+    parser = argparse.ArgumentParser(
+        description="Find degrees of separation between two people.")
+    parser.add_argument("directory", nargs="?", default="large")
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument("--batch", metavar="FILE",
+                      help="answer the name pairs in FILE ('-' for stdin) "
+                           "as JSON lines")
+    mode.add_argument("--serve", action="store_true",
+                      help="answer name pairs from stdin until it closes")
+    mode.add_argument("--socket", metavar="PATH",
+                      help="answer name pairs sent to a Unix socket")
+    parser.add_argument("--output", metavar="FILE",
+                        help="write batch results to FILE instead of stdout")
+    parser.add_argument("--workers", type=int,
+                        help="number of worker processes")
+    parser.add_argument("--min-year", type=int,
+                        help="only load movies released in or after a year")
+    parser.add_argument("--max-year", type=int,
+                        help="only load movies released in or before a year")
+    parser.add_argument("--landmarks", type=int, default=0, metavar="K",
+                        help="precompute distances from K landmark people "
+                             "to cut searches short, worth it for many "
+                             "queries")
+    arguments = parser.parse_args()
+    if arguments.landmarks < 0:
+        parser.error("--landmarks must not be negative")
+    if arguments.batch and (arguments.min_year is not None
+                            or arguments.max_year is not None):
+        parser.error("--batch uses the full dataset snapshot, "
+                     "year filters are not supported")
+    return arguments
+
+
+def open_data(arguments):
+    """
+    Returns the graph from the snapshot, or loads only the chosen
+    years from the files and reports the rows that were left out,
+    with the landmarks asked for.
+    """
+    if arguments.min_year is None and arguments.max_year is None:
+        graph = open_graph(arguments.directory, arguments.workers)
+    else:
+        graph, report = load_filtered_graph(
+            arguments.directory, arguments.min_year, arguments.max_year,
+            workers=arguments.workers)
+        print(report, file=sys.stderr)
+    if arguments.landmarks:
+        graph.landmarks = Landmarks(graph, arguments.landmarks)
+    return graph
 
-    # Load data from files into memory
+
+def main():
+    arguments = parse_arguments()
+    directory = arguments.directory
+
+    # Answer many queries without prompting
+    if arguments.batch:
+        with contextlib.ExitStack() as stack:
+            queries, output = sys.stdin, sys.stdout
+            if arguments.batch != "-":
+                queries = stack.enter_context(
+                    open(arguments.batch, encoding="utf-8"))
+            if arguments.output:
+                output = stack.enter_context(
+                    open(arguments.output, "w", encoding="utf-8"))
+            run_batch(directory, queries, output, arguments.workers,
+                      arguments.landmarks)
+        return
+    if arguments.serve:
+        serve(open_data(arguments))
+        return
+    if arguments.socket:
+        serve_socket(open_data(arguments), arguments.socket)
+        return
+
+    # Load data from the snapshot or the files into a compact graph
     print("Loading data...")
-    load_data(directory)
+    graph = open_data(arguments)
     print("Data loaded.")
 
-    source = person_id_for_name(input("Name: "))
+    source = person_id_for_name(input("Name: "), graph)
     if source is None:
         sys.exit("Person not found.")
-    target = person_id_for_name(input("Name: "))
+    target = person_id_for_name(input("Name: "), graph)
     if target is None:
         sys.exit("Person not found.")
 
-    path = shortest_path(source, target)
+    path = graph.shortest_path(source, target)
 
     if path is None:
         print("Not connected.")
@@ -78,30 +155,36 @@ def main():
         print(f"{degrees} degrees of separation.")
         path = [(None, source)] + path
         for i in range(degrees):
-            person1 = people[path[i][1]]["name"]
-            person2 = people[path[i + 1][1]]["name"]
-            movie = movies[path[i + 1][0]]["title"]
+            person1 = graph.person(path[i][1])["name"]
+            person2 = graph.person(path[i + 1][1])["name"]
+            movie = graph.movie(path[i + 1][0])["title"]
             print(f"{i + 1}: {person1} and {person2} starred in {movie}")
 
 
-def shortest_path(source, target):
+def shortest_path(source, target, bidirectional=False):
     """
     Returns the shortest list of (movie_id, person_id) pairs
     that connect the source to the target.
 
     If no possible path, returns None.
+
+    With bidirectional set to True the search grows from both
+    ends at once and meets in the middle.
     """
 
     # Return empty list when source and target are the same person
     if source == target:
         return []
 
+    if bidirectional:
+        return bidirectional_search(source, target)
+
     # Initialize frontier and add initial state
     frontier = QueueFrontier()
     initial_node = Node(source, None, None)
     frontier.add(initial_node)
 
-    # Initialize an empty explored set
+    # Initialize an empty explored set of person_ids
     explored = set()
 
     # Keep looping until solution is found
@@ -114,8 +197,8 @@ def shortest_path(source, target):
         # Remove first node from the frontier
         node = frontier.remove()
 
-        # Add the node to the explored set
-        explored.add(node)
+        # Add the person to the explored set
+        explored.add(node.state)
 
         # Expand the node
         neighbors = neighbors_for_person(node.state)
@@ -135,22 +218,104 @@ def shortest_path(source, target):
             # Add resulting nodes to the frontier if they are not
             # already in the frontier or the explored set
             if not frontier.contains_state(person_id) and \
-                    not any(node.state == person_id for node in explored):
+                    person_id not in explored:
                 frontier.add(Node(person_id, node, movie_id))
 
 
-def person_id_for_name(name):
+def bidirectional_search(source, target):
+    """
+    Breadth-first search run from both the source and the target.
+
+    Each side keeps a dict that maps a visited person_id to the
+    (movie_id, person_id) pair it was reached from. Whole levels are
+    expanded at a time, always on the side with the smaller frontier,
+    and the first person seen by both sides lies on a shortest path.
+    """
+    forward_parents = {source: None}
+    backward_parents = {target: None}
+    forward_frontier = [source]
+    backward_frontier = [target]
+
+    while forward_frontier and backward_frontier:
+
+        # Expand the smaller frontier
+        if len(forward_frontier) <= len(backward_frontier):
+            forward_frontier, meeting = expand_level(
+                forward_frontier, forward_parents, backward_parents)
+        else:
+            backward_frontier, meeting = expand_level(
+                backward_frontier, backward_parents, forward_parents)
+
+        if meeting is not None:
+            return join_paths(meeting, forward_parents, backward_parents)
+
+    # One of the sides ran out of people, no connection
+    return None
+
+
+def expand_level(frontier, parents, other_parents):
+    """
+    Expands every person in the frontier by one step.
+
+    Returns the next frontier and the first person already
+    reached by the other side of the search, or None.
+    """
+    next_frontier = []
+    for person_id in frontier:
+        for movie_id, neighbor_id in neighbors_for_person(person_id):
+            if neighbor_id in parents:
+                continue
+            parents[neighbor_id] = (movie_id, person_id)
+            if neighbor_id in other_parents:
+                return next_frontier, neighbor_id
+            next_frontier.append(neighbor_id)
+    return next_frontier, None
+
+
+def join_paths(meeting, forward_parents, backward_parents):
+    """
+    Builds the (movie_id, person_id) path through the meeting person
+    from the parent links of both sides of the search.
+    """
+    # Walk back from the meeting person to the source
+    path = []
+    person_id = meeting
+    while forward_parents[person_id] is not None:
+        movie_id, parent_id = forward_parents[person_id]
+        path.append((movie_id, person_id))
+        person_id = parent_id
+    path.reverse()
+
+    # Walk forward from the meeting person to the target
+    person_id = meeting
+    while backward_parents[person_id] is not None:
+        movie_id, person_id = backward_parents[person_id]
+        path.append((movie_id, person_id))
+
+    return path
+
+
+def person_id_for_name(name, graph=None):
     """
     Returns the IMDB id for a person's name,
     resolving ambiguities as needed.
+
+    Looks the name up in the given Graph, or in the
+    module dicts filled by load_data if there is none.
     """
-    person_ids = list(names.get(name.lower(), set()))
+    if graph is not None:
+        person_ids = graph.person_ids_for_name(name)
+    else:
+        person_ids = list(names.get(name.lower(), set()))
     if len(person_ids) == 0:
         return None
     elif len(person_ids) > 1:
         print(f"Which '{name}'?")
         for person_id in person_ids:
-            person = people[person_id]
+            if graph is not None:
+                person = graph.person(person_id)
+            else:
+                person = people[person_id]
             name = person["name"]
             birth = person["birth"]
             print(f"ID: {person_id}, Name: {name}, Birth: {birth}")
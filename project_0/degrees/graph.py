@@ -0,0 +1,261 @@
+"""
+Compact co-star graph for the degrees search.
+
+People and movies are interned to consecutive integers and the
+bipartite person <-> movie graph is stored in compressed sparse row
+(CSR) form: for person p the movies are
+movies[person_offsets[p]:person_offsets[p + 1]], and the same layout
+holds for the stars of every movie.
+"""
+
+from array import array
+
+# Type code of the integer arrays
+INDEX_TYPE = "i"
+
+
+class Graph():
+    """
+    Bipartite person <-> movie graph over integer indices.
+    """
+
+    def __init__(self):
+
+        # IMDb ids, names and birth years by person index
+        self.person_ids = []
+        self.person_names = []
+        self.person_births = []
+
+        # IMDb ids, titles and years by movie index
+        self.movie_ids = []
+        self.movie_titles = []
+        self.movie_years = []
+
+        # Maps IMDb ids back to indices
+        self.person_index = {}
+        self.movie_index = {}
+
+        # Maps lowercase names to a list of person indices
+        self.names = {}
+
+        # CSR adjacency in both directions
+        self.person_offsets = array(INDEX_TYPE, [0])
+        self.person_movies = array(INDEX_TYPE)
+        self.movie_offsets = array(INDEX_TYPE, [0])
+        self.movie_people = array(INDEX_TYPE)
+
+        # Memory map the arrays live in when loaded from a snapshot
+        self.snapshot = None
+
+        # Landmarks whose distance bounds cut searches short, if any
+        self.landmarks = None
+
+    def add_person(self, person_id, name, birth):
+        """Interns a person and returns their index."""
+        index = len(self.person_ids)
+        self.person_index[person_id] = index
+        self.person_ids.append(person_id)
+        self.person_names.append(name)
+        self.person_births.append(birth)
+        self.names.setdefault(name.lower(), []).append(index)
+        return index
+
+    def add_movie(self, movie_id, title, year):
+        """Interns a movie and returns its index."""
+        index = len(self.movie_ids)
+        self.movie_index[movie_id] = index
+        self.movie_ids.append(movie_id)
+        self.movie_titles.append(title)
+        self.movie_years.append(year)
+        return index
+
+    def add_stars(self, person_column, movie_column):
+        """
+        Builds both CSR adjacency arrays from two parallel arrays
+        of (person, movie) star edges with a counting sort.
+        """
+        self.person_offsets, self.person_movies = build_csr(
+            len(self.person_ids), person_column, movie_column)
+        self.movie_offsets, self.movie_people = build_csr(
+            len(self.movie_ids), movie_column, person_column)
+
+    def person_ids_for_name(self, name):
+        """Returns the IMDb ids of every person with the given name."""
+        return [self.person_ids[index]
+                for index in self.names.get(name.lower(), [])]
+
+    def person(self, person_id):
+        """Returns a dict with the name and birth of a person."""
+        index = self.person_index[person_id]
+        return {"name": self.person_names[index],
+                "birth": self.person_births[index]}
+
+    def movie(self, movie_id):
+        """Returns a dict with the title and year of a movie."""
+        index = self.movie_index[movie_id]
+        return {"title": self.movie_titles[index],
+                "year": self.movie_years[index]}
+
+    def neighbors(self, person):
+        """
+        Yields (movie, person) index pairs for people who starred
+        with the person at the given index.
+        """
+        person_movies = self.person_movies
+        movie_offsets = self.movie_offsets
+        movie_people = self.movie_people
+        for i in range(self.person_offsets[person],
+                       self.person_offsets[person + 1]):
+            movie = person_movies[i]
+            for j in range(movie_offsets[movie], movie_offsets[movie + 1]):
+                yield movie, movie_people[j]
+
+    def search(self, source, target, stats=None):
+        """
+        Bidirectional breadth-first search over person indices.
+
+        With landmarks, people they show to be unconnected are not
+        searched, and the search stops as soon as the levels searched
+        prove that the path through a landmark is a shortest one.
+
+        Returns the list of (movie, person) index pairs that lead
+        from the source to the target, or None if not connected.
+        The number of expanded people is stored in stats["expanded"].
+        """
+        if stats is None:
+            stats = {}
+        stats["expanded"] = 0
+        if source == target:
+            return []
+
+        lower, upper = 1, None
+        if self.landmarks is not None:
+            lower, upper = self.landmarks.bounds(source, target)
+            if lower is None:
+                return None
+
+        forward_parents = {source: None}
+        backward_parents = {target: None}
+        forward_frontier = [source]
+        backward_frontier = [target]
+
+        # Levels expanded on both sides, all paths this short are ruled out
+        levels = 0
+        while forward_frontier and backward_frontier:
+            if upper is not None and max(lower, levels + 1) >= upper:
+                return self.landmarks.path(source, target)
+
+            frontier = forward_frontier
+            parents = forward_parents
+            if len(forward_frontier) <= len(backward_frontier):
+                forward_frontier, meeting = self.expand_level(
+                    forward_frontier, forward_parents, backward_parents)
+            else:
+                frontier = backward_frontier
+                parents = backward_parents
+                backward_frontier, meeting = self.expand_level(
+                    backward_frontier, backward_parents, forward_parents)
+            levels += 1
+
+            if meeting is None:
+                stats["expanded"] += len(frontier)
+                continue
+
+            # The level stopped at the person who reached the meeting
+            _, person = parents[meeting]
+            stats["expanded"] += frontier.index(person) + 1
+            return join_paths(meeting, forward_parents, backward_parents)
+
+        return None
+
+    def expand_level(self, frontier, parents, other_parents):
+        """
+        Expands every person in the frontier by one step.
+
+        Returns the next frontier and the first person already
+        reached by the other side of the search, or None.
+        """
+        # Local names keep attribute lookups out of the inner loops
+        person_offsets = self.person_offsets
+        person_movies = self.person_movies
+        movie_offsets = self.movie_offsets
+        movie_people = self.movie_people
+
+        next_frontier = []
+        for person in frontier:
+            for i in range(person_offsets[person], person_offsets[person + 1]):
+                movie = person_movies[i]
+                for j in range(movie_offsets[movie], movie_offsets[movie + 1]):
+                    neighbor = movie_people[j]
+                    if neighbor in parents:
+                        continue
+                    parents[neighbor] = (movie, person)
+                    if neighbor in other_parents:
+                        return next_frontier, neighbor
+                    next_frontier.append(neighbor)
+        return next_frontier, None
+
+    def shortest_path(self, source, target):
+        """
+        Returns the shortest list of (movie_id, person_id) pairs
+        that connect the source to the target IMDb ids.
+
+        If no possible path, returns None.
+        """
+        path = self.search(self.person_index[source],
+                           self.person_index[target])
+        if path is None:
+            return None
+        return self.path_ids(path)
+
+    def path_ids(self, path):
+        """Maps a (movie, person) index path to IMDb ids."""
+        return [(self.movie_ids[movie], self.person_ids[person])
+                for movie, person in path]
+
+
+def build_csr(size, rows, columns):
+    """
+    Returns (offsets, values) arrays so that the columns of row r are
+    values[offsets[r]:offsets[r + 1]].
+    """
+    offsets = zeros(size + 1)
+    for row in rows:
+        offsets[row + 1] += 1
+    for i in range(size):
+        offsets[i + 1] += offsets[i]
+
+    # Fill values using a moving insert position for every row
+    position = offsets[:-1]
+    values = zeros(len(rows))
+    for row, column in zip(rows, columns):
+        values[position[row]] = column
+        position[row] += 1
+    return offsets, values
+
+
+def zeros(size):
+    """Returns an index array of the given size filled with zeros."""
+    return array(INDEX_TYPE, bytes(array(INDEX_TYPE).itemsize * size))
+
+
+def join_paths(meeting, forward_parents, backward_parents):
+    """
+    Builds the (movie, person) path through the meeting person
+    from the parent links of both sides of the search.
+    """
+    path = []
+    person = meeting
+    while forward_parents[person] is not None:
+        movie, parent = forward_parents[person]
+        path.append((movie, person))
+        person = parent
+    path.reverse()
+
+    person = meeting
+    while backward_parents[person] is not None:
+        movie, person = backward_parents[person]
+        path.append((movie, person))
+
+    return path
+
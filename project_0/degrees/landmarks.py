@@ -0,0 +1,238 @@
+"""
+Landmark (ALT) distance oracle for the compact co-star graph.
+
+Distances from a few well connected landmark people are computed
+once. By the triangle inequality, for every landmark L
+
+    |d(L, s) - d(L, t)| <= d(s, t) <= d(L, s) + d(L, t)
+
+which gives instant lower and upper bounds on the degrees between
+two people. Set as the landmarks of a Graph, the bounds let its
+bidirectional search skip people that cannot be connected and stop
+once the levels searched rule out every path shorter than the one
+through a landmark, which is then read off the landmark distances.
+The lower bound is also an admissible heuristic for the A* search.
+"""
+
+import heapq
+from array import array
+
+from graph import join_paths
+
+# Distance of people a landmark does not reach, fits in one byte
+UNREACHED = 255
+
+
+def bfs_distances(graph, source):
+    """
+    Returns a byte array of the distances from the source to every
+    person, with UNREACHED for people not connected to the source.
+    """
+    person_offsets = graph.person_offsets
+    person_movies = graph.person_movies
+    movie_offsets = graph.movie_offsets
+    movie_people = graph.movie_people
+
+    distances = array("B", [UNREACHED]) * len(graph.person_ids)
+    distances[source] = 0
+    frontier = [source]
+    distance = 0
+    while frontier and distance < UNREACHED - 1:
+        distance += 1
+        next_frontier = []
+        for person in frontier:
+            for i in range(person_offsets[person], person_offsets[person + 1]):
+                movie = person_movies[i]
+                for j in range(movie_offsets[movie], movie_offsets[movie + 1]):
+                    neighbor = movie_people[j]
+                    if distances[neighbor] == UNREACHED:
+                        distances[neighbor] = distance
+                        next_frontier.append(neighbor)
+        frontier = next_frontier
+    return distances
+
+
+def costar_counts(graph):
+    """
+    Returns for every person the number of star credits shared with
+    them, counting a co-star once per movie, as a measure of how
+    well connected they are.
+    """
+    person_offsets = graph.person_offsets
+    person_movies = graph.person_movies
+    movie_offsets = graph.movie_offsets
+    counts = []
+    for person in range(len(graph.person_ids)):
+        count = 0
+        for i in range(person_offsets[person], person_offsets[person + 1]):
+            movie = person_movies[i]
+            count += movie_offsets[movie + 1] - movie_offsets[movie] - 1
+        counts.append(count)
+    return counts
+
+
+class Landmarks():
+    """
+    Distances from k hub people to everybody in a graph.
+    """
+
+    def __init__(self, graph, k=8):
+        self.graph = graph
+
+        # Pick the people with the most co-stars, skipping those right
+        # next to a chosen landmark since they add little information
+        counts = costar_counts(graph)
+        hubs = sorted(range(len(counts)), key=counts.__getitem__,
+                      reverse=True)
+        self.people = []
+        self.distances = []
+        for person in hubs:
+            if len(self.people) == k or counts[person] == 0:
+                break
+            if any(distances[person] <= 1 for distances in self.distances):
+                continue
+            self.people.append(person)
+            self.distances.append(bfs_distances(graph, person))
+
+    def bounds(self, source, target):
+        """
+        Returns (lower, upper) bounds on the degrees between two
+        person indices, where lower is None if they are certainly not
+        connected and upper is None if no landmark reaches both.
+        """
+        if source == target:
+            return 0, 0
+        lower, upper = 1, None
+        for distances in self.distances:
+            s, t = distances[source], distances[target]
+            if s == UNREACHED and t == UNREACHED:
+                continue
+            if s == UNREACHED or t == UNREACHED:
+                return None, None
+            lower = max(lower, abs(s - t))
+            upper = s + t if upper is None else min(upper, s + t)
+        return lower, upper
+
+    def heuristic(self, target):
+        """
+        Returns a function giving the lower bound from a person index
+        to the target, or None when the two cannot be connected.
+        """
+        targets = [(distances, distances[target])
+                   for distances in self.distances]
+
+        def estimate(person):
+            bound = 0
+            for distances, t in targets:
+                s = distances[person]
+                if (s == UNREACHED) != (t == UNREACHED):
+                    return None
+                if s != UNREACHED and abs(s - t) > bound:
+                    bound = abs(s - t)
+            return bound
+
+        return estimate
+
+    def search(self, source, target, stats=None):
+        """
+        A* search over person indices steered by the landmark bound.
+        It searches from one side only, so it expands more people than
+        the bidirectional search of the graph and is only kept for
+        comparison in benchmark.py.
+
+        Returns the list of (movie, person) index pairs that lead
+        from the source to the target, or None if not connected.
+        The number of expanded people is stored in stats["expanded"].
+        """
+        if stats is None:
+            stats = {}
+        stats["expanded"] = 0
+        if source == target:
+            return []
+
+        graph = self.graph
+        person_offsets = graph.person_offsets
+        person_movies = graph.person_movies
+        movie_offsets = graph.movie_offsets
+        movie_people = graph.movie_people
+        estimate = self.heuristic(target)
+
+        start = estimate(source)
+        if start is None:
+            return None
+
+        # Priority is (f, -g) so that deeper people win ties
+        parents = {source: None}
+        depths = {source: 0}
+        queue = [(start, 0, source)]
+        while queue:
+            _, negative_depth, person = heapq.heappop(queue)
+            depth = -negative_depth
+            if depth > depths[person]:
+                continue
+            if person == target:
+                return join_paths(target, parents, {target: None})
+            stats["expanded"] += 1
+
+            for i in range(person_offsets[person], person_offsets[person + 1]):
+                movie = person_movies[i]
+                for j in range(movie_offsets[movie], movie_offsets[movie + 1]):
+                    neighbor = movie_people[j]
+                    if depth + 1 >= depths.get(neighbor, UNREACHED):
+                        continue
+                    bound = estimate(neighbor)
+                    if bound is None:
+                        continue
+                    depths[neighbor] = depth + 1
+                    parents[neighbor] = (movie, person)
+                    heapq.heappush(queue, (depth + 1 + bound, -depth - 1,
+                                           neighbor))
+        return None
+
+    def path(self, source, target):
+        """
+        Returns the (movie, person) index path from the source to the
+        target through the landmark giving the upper bound, or None if
+        no landmark reaches both.
+        """
+        best, through = None, None
+        for distances in self.distances:
+            s, t = distances[source], distances[target]
+            if s == UNREACHED or t == UNREACHED:
+                continue
+            if best is None or s + t < best:
+                best, through = s + t, distances
+        if through is None:
+            return None
+
+        # Walk down to the landmark from both ends, then turn the
+        # steps from the target around
+        path = self.descend(source, through)
+        steps = self.descend(target, through)
+        people = [target] + [person for _, person in steps]
+        for i in range(len(steps) - 1, -1, -1):
+            movie, _ = steps[i]
+            path.append((movie, people[i]))
+        return path
+
+    def descend(self, person, distances):
+        """
+        Returns the (movie, person) steps from a person to the
+        landmark of the distances, one closer to it every step.
+        """
+        steps = []
+        distance = distances[person]
+        while distance > 0:
+            distance -= 1
+            for movie, neighbor in self.graph.neighbors(person):
+                if distances[neighbor] == distance:
+                    break
+            steps.append((movie, neighbor))
+            person = neighbor
+        return steps
+
+    def distance_bounds(self, source, target):
+        """Returns the (lower, upper) degree bounds for two IMDb ids."""
+        graph = self.graph
+        return self.bounds(graph.person_index[source],
+                           graph.person_index[target])
@@ -0,0 +1,240 @@
+"""
+Streaming, filtered loader for the degrees CSV files.
+
+Every file is cut into byte ranges that end on line boundaries and
+the ranges are parsed in parallel by a pool of worker processes.
+Rows can be filtered by movie year and by a subset of people while
+they are read, and rows that cannot be loaded are counted in a
+LoadReport instead of being dropped silently.
+
+The CSV files must not contain line breaks inside quoted fields,
+which holds for the IMDb extracts this project uses.
+"""
+
+import csv
+import io
+import os
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+
+from graph import Graph, INDEX_TYPE
+
+# Bytes of a file parsed by one task
+CHUNK_SIZE = 8 << 20
+
+# Expected header of every file
+COLUMNS = {
+    "people.csv": ["id", "name", "birth"],
+    "movies.csv": ["id", "title", "year"],
+    "stars.csv": ["person_id", "movie_id"],
+}
+
+
+class LoadReport():
+    """
+    Counts of the rows read, loaded, filtered out and rejected
+    for every file, with rejected rows grouped by reason.
+    """
+
+    def __init__(self):
+        self.files = {name: {"rows": 0, "loaded": 0, "filtered": 0,
+                             "rejected": {}}
+                      for name in COLUMNS}
+
+    def add(self, name, counts):
+        """Adds the counts of one parsed chunk."""
+        totals = self.files[name]
+        for key in ("rows", "loaded", "filtered"):
+            totals[key] += counts.get(key, 0)
+        for reason, count in counts.get("rejected", {}).items():
+            totals["rejected"][reason] = \
+                totals["rejected"].get(reason, 0) + count
+
+    def reject(self, name, reason, count=1):
+        """Moves rows of a file from loaded to rejected."""
+        self.files[name]["loaded"] -= count
+        rejected = self.files[name]["rejected"]
+        rejected[reason] = rejected.get(reason, 0) + count
+
+    def filter(self, name, count=1):
+        """Moves rows of a file from loaded to filtered."""
+        self.files[name]["loaded"] -= count
+        self.files[name]["filtered"] += count
+
+    def rejected(self):
+        """Returns the total number of rejected rows."""
+        return sum(sum(counts["rejected"].values())
+                   for counts in self.files.values())
+
+    def __str__(self):
+        lines = []
+        for name, counts in self.files.items():
+            line = (f"{name}: {counts['rows']} rows, "
+                    f"{counts['loaded']} loaded, "
+                    f"{counts['filtered']} filtered")
+            for reason, count in sorted(counts["rejected"].items()):
+                line += f", {count} rejected ({reason})"
+            lines.append(line)
+        return "\n".join(lines)
+
+
+def chunk_ranges(path, chunk_size=CHUNK_SIZE):
+    """
+    Returns (start, end) byte ranges that cover the file after its
+    header line, each ending on a line boundary.
+    """
+    ranges = []
+    with open(path, "rb") as f:
+        f.readline()
+        start = f.tell()
+        size = os.fstat(f.fileno()).st_size
+        while start < size:
+            f.seek(min(start + chunk_size, size))
+            f.readline()
+            end = min(f.tell(), size)
+            ranges.append((start, end))
+            start = end
+    return ranges
+
+
+def read_header(path):
+    with open(path, encoding="utf-8", newline="") as f:
+        return next(csv.reader(f), [])
+
+
+def parse_chunk(path, name, start, end, filters):
+    """
+    Parses one byte range of a file.
+
+    Returns (rows, counts, filtered_ids) where rows hold the values
+    of the accepted rows, counts the numbers for the LoadReport and
+    filtered_ids the ids of the movies left out by the year filter.
+    """
+    with open(path, "rb") as f:
+        f.seek(start)
+        text = f.read(end - start).decode("utf-8")
+
+    min_year, max_year, person_ids = filters
+    columns = len(COLUMNS[name])
+    rows = []
+    counts = {"rows": 0, "loaded": 0, "filtered": 0, "rejected": {}}
+    rejected = counts["rejected"]
+    filtered_ids = []
+
+    for row in csv.reader(io.StringIO(text, newline="")):
+        counts["rows"] += 1
+        if len(row) != columns or not row[0]:
+            rejected["malformed row"] = rejected.get("malformed row", 0) + 1
+            continue
+
+        # Keep only the chosen people
+        if person_ids is not None and name != "movies.csv" \
+                and row[0] not in person_ids:
+            counts["filtered"] += 1
+            continue
+
+        # Keep only movies from the chosen years
+        if name == "movies.csv" and (min_year, max_year) != (None, None):
+            try:
+                year = int(row[2])
+            except ValueError:
+                rejected["invalid year"] = rejected.get("invalid year", 0) + 1
+                continue
+            if (min_year is not None and year < min_year) or \
+                    (max_year is not None and year > max_year):
+                counts["filtered"] += 1
+                filtered_ids.append(row[0])
+                continue
+
+        counts["loaded"] += 1
+        rows.append(row)
+
+    return rows, counts, filtered_ids
+
+
+def stream_file(directory, name, filters, executor):
+    """
+    Yields (rows, counts, filtered_ids) for every chunk of a file
+    in order, parsing the chunks in the executor when there is one.
+    """
+    path = os.path.join(directory, name)
+    if read_header(path) != COLUMNS[name]:
+        raise ValueError(f"{path} does not have columns {COLUMNS[name]}")
+    starts, ends = [], []
+    for start, end in chunk_ranges(path):
+        starts.append(start)
+        ends.append(end)
+    arguments = (repeat(path), repeat(name), starts, ends, repeat(filters))
+    if executor is None:
+        yield from map(parse_chunk, *arguments)
+    else:
+        yield from executor.map(parse_chunk, *arguments)
+
+
+def load_filtered_graph(directory, min_year=None, max_year=None,
+                        person_ids=None, workers=None):
+    """
+    Loads a Graph with only the movies released between min_year and
+    max_year and only the people in person_ids, leaving a bound or
+    the subset as None to keep everything.
+
+    Returns (graph, report).
+    """
+    if person_ids is not None:
+        person_ids = frozenset(person_ids)
+    filters = (min_year, max_year, person_ids)
+    graph = Graph()
+    report = LoadReport()
+
+    executor = None
+    if workers is None or workers > 1:
+        executor = ProcessPoolExecutor(max_workers=workers)
+    try:
+
+        # Load people
+        for rows, counts, _ in stream_file(directory, "people.csv",
+                                           filters, executor):
+            report.add("people.csv", counts)
+            for person_id, name, birth in rows:
+                if person_id in graph.person_index:
+                    report.reject("people.csv", "duplicate id")
+                    continue
+                graph.add_person(person_id, name, birth)
+
+        # Load movies, remembering the ones left out by year
+        filtered_movies = set()
+        for rows, counts, filtered_ids in stream_file(
+                directory, "movies.csv", filters, executor):
+            report.add("movies.csv", counts)
+            filtered_movies.update(filtered_ids)
+            for movie_id, title, year in rows:
+                if movie_id in graph.movie_index:
+                    report.reject("movies.csv", "duplicate id")
+                    continue
+                graph.add_movie(movie_id, title, year)
+
+        # Load stars of the people and movies that were kept
+        person_column = array(INDEX_TYPE)
+        movie_column = array(INDEX_TYPE)
+        for rows, counts, _ in stream_file(directory, "stars.csv",
+                                           filters, executor):
+            report.add("stars.csv", counts)
+            for person_id, movie_id in rows:
+                person = graph.person_index.get(person_id)
+                movie = graph.movie_index.get(movie_id)
+                if person is None:
+                    report.reject("stars.csv", "unknown person")
+                elif movie is None and movie_id in filtered_movies:
+                    report.filter("stars.csv")
+                elif movie is None:
+                    report.reject("stars.csv", "unknown movie")
+                else:
+                    person_column.append(person)
+                    movie_column.append(movie)
+    finally:
+        if executor is not None:
+            executor.shutdown()
+
+    graph.add_stars(person_column, movie_column)
+    return graph, report
@@ -0,0 +1,237 @@
+"""
+Prefix and fuzzy name lookup for the compact co-star graph.
+
+The index is built once from the names of a Graph and answers
+autocomplete and misspelled name queries with ranked candidates,
+without asking anything on the terminal.
+"""
+
+import heapq
+import unicodedata
+from array import array
+from bisect import bisect_left
+from collections import Counter
+
+from graph import INDEX_TYPE
+
+# Prefixes matching more entries than this are answered from
+# the best names kept for them when the index is built
+MAX_SCAN = 2000
+
+# Best names kept for every such prefix, the most candidates they answer
+TOP_NAMES = 50
+
+# Least trigram similarity of a fuzzy match
+MIN_SCORE = 0.3
+
+
+def normalize(name):
+    """
+    Returns the name lowercased, without accents and with
+    single spaces between words.
+    """
+    decomposed = unicodedata.normalize("NFKD", name.lower())
+    stripped = "".join(c for c in decomposed if not unicodedata.combining(c))
+    return " ".join(stripped.split())
+
+
+def trigrams(key):
+    """Returns the set of letter trigrams of a normalized name."""
+    padded = f"  {key} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class NameIndex():
+    """
+    Sorted word-prefix table and trigram index over the distinct
+    normalized names of a graph.
+    """
+
+    def __init__(self, graph):
+        self.graph = graph
+
+        # Distinct normalized names and the people that have them
+        self.keys = []
+        self.people = []
+        self.name_ids = {}
+        for name, indices in graph.names.items():
+            key = normalize(name)
+            if key not in self.name_ids:
+                self.name_ids[key] = len(self.keys)
+                self.keys.append(key)
+                self.people.append([])
+            self.people[self.name_ids[key]].extend(indices)
+
+        # Most movies of anyone with each name
+        self.best_movies = [
+            max(self.movie_count(person) for person in people)
+            for people in self.people]
+
+        # Every name once for each word it can be completed from
+        entries = []
+        for name_id, key in enumerate(self.keys):
+            start = 0
+            while True:
+                entries.append((key[start:], name_id))
+                start = key.find(" ", start) + 1
+                if not start:
+                    break
+        entries.sort()
+        self.prefix_keys = [key for key, _ in entries]
+        self.prefix_names = array(INDEX_TYPE, [name_id for _, name_id
+                                               in entries])
+        self.top = self.top_names()
+
+        # Maps trigrams to the names that contain them
+        postings = {}
+        for name_id, key in enumerate(self.keys):
+            for trigram in trigrams(key):
+                postings.setdefault(trigram, []).append(name_id)
+        self.postings = {trigram: array(INDEX_TYPE, name_ids)
+                         for trigram, name_ids in postings.items()}
+
+    def top_names(self):
+        """
+        Returns {prefix: (names, word names)} for every prefix of more
+        than MAX_SCAN entries, holding the TOP_NAMES names with the
+        most movies that start with it, and that have a later word
+        starting with it.
+        """
+        keys = self.prefix_keys
+        top = {}
+        groups = [("", 0, len(keys))]
+        while groups:
+            prefix, start, end = groups.pop()
+
+            # Split the entries by their next character
+            length = len(prefix)
+            i = start
+            while i < end:
+                key = keys[i]
+                if len(key) == length:
+                    i += 1
+                    continue
+                longer = key[:length + 1]
+                j = bisect_left(keys, following(longer), i, end)
+                if j - i > MAX_SCAN:
+                    top[longer] = self.best_names(i, j)
+                    groups.append((longer, i, j))
+                i = j
+        return top
+
+    def best_names(self, start, end):
+        """
+        Returns the TOP_NAMES names with the most movies among the
+        whole names and among the later words of a range of entries.
+        """
+        names = set()
+        word_names = set()
+        for i in range(start, end):
+            name_id = self.prefix_names[i]
+            if self.keys[name_id] == self.prefix_keys[i]:
+                names.add(name_id)
+            else:
+                word_names.add(name_id)
+
+        def rank(name_id):
+            return -self.best_movies[name_id], self.keys[name_id]
+
+        return (heapq.nsmallest(TOP_NAMES, names, key=rank),
+                heapq.nsmallest(TOP_NAMES, word_names, key=rank))
+
+    def movie_count(self, person):
+        """Returns the number of movies of a person index."""
+        offsets = self.graph.person_offsets
+        return offsets[person + 1] - offsets[person]
+
+    def candidate(self, person, score):
+        graph = self.graph
+        return {"person_id": graph.person_ids[person],
+                "name": graph.person_names[person],
+                "birth": graph.person_births[person],
+                "movies": self.movie_count(person),
+                "score": score}
+
+    def ranked(self, scores, limit):
+        """
+        Returns candidates for the best scored names, breaking ties
+        by the number of movies a person starred in.
+        """
+        candidates = []
+        for name_id, score in scores.items():
+            for person in self.people[name_id]:
+                candidates.append((-score, -self.movie_count(person),
+                                   self.keys[name_id], person))
+        candidates.sort()
+        return [self.candidate(person, -score)
+                for score, _, _, person in candidates[:limit]]
+
+    def complete(self, prefix, limit=10):
+        """
+        Returns up to limit candidates whose name, or one of its
+        words, starts with the prefix. Exact names come first and
+        names starting with the prefix before later words.
+        """
+        prefix = normalize(prefix)
+        if not prefix:
+            return []
+        scores = {}
+        start = bisect_left(self.prefix_keys, prefix)
+        end = bisect_left(self.prefix_keys, following(prefix), start)
+
+        # Long ranges have their best names ready
+        if end - start > MAX_SCAN and limit <= TOP_NAMES:
+            names, word_names = self.top[prefix]
+            for name_id in word_names:
+                scores[name_id] = 0.8
+            for name_id in names:
+                scores[name_id] = 0.9
+            if prefix in self.name_ids:
+                scores[self.name_ids[prefix]] = 1.0
+            return self.ranked(scores, limit)
+
+        for i in range(start, end):
+            key = self.prefix_keys[i]
+            name_id = self.prefix_names[i]
+            full_name = self.keys[name_id]
+            if full_name == prefix:
+                score = 1.0
+            elif full_name == key:
+                score = 0.9
+            else:
+                score = 0.8
+            scores[name_id] = max(score, scores.get(name_id, 0))
+        return self.ranked(scores, limit)
+
+    def search(self, name, limit=10):
+        """
+        Returns up to limit candidates for a possibly misspelled name,
+        ranked by the trigram similarity of their names.
+        """
+        key = normalize(name)
+        if not key:
+            return []
+        query = trigrams(key)
+
+        # Any name similar enough shares one of the rarest trigrams
+        known = sorted((trigram for trigram in query
+                        if trigram in self.postings),
+                       key=lambda trigram: len(self.postings[trigram]))
+        needed = int(len(query) * (1 - MIN_SCORE)) + 1
+        overlaps = Counter()
+        for trigram in known[:needed]:
+            overlaps.update(self.postings[trigram])
+
+        scores = {}
+        for name_id in overlaps:
+            other = trigrams(self.keys[name_id])
+            shared = len(query & other)
+            score = shared / (len(query) + len(other) - shared)
+            if score >= MIN_SCORE:
+                scores[name_id] = round(score, 3)
+        return self.ranked(scores, limit)
+
+
+def following(prefix):
+    """Returns the first string after every string with the prefix."""
+    return prefix[:-1] + chr(ord(prefix[-1]) + 1)
@@ -0,0 +1,250 @@
+"""
+Binary snapshot cache for the compact co-star graph.
+
+The first load of a dataset directory parses the CSV files with the
+loader module, reporting rows it cannot load, and writes
+graph.snapshot next to them. Later loads memory-map the snapshot: the
+CSR arrays are used in place and only the string tables are unpickled.
+The snapshot is rebuilt when the size and mtime of a CSV file change
+and its SHA-1 hash no longer matches either. When the hash still
+matches, the new size and mtime are written to the snapshot header so
+the file is not hashed again. A directory the snapshot cannot be
+written to is loaded from the CSV files every time.
+"""
+
+import hashlib
+import json
+import mmap
+import os
+import pickle
+import struct
+import sys
+
+from graph import Graph, INDEX_TYPE
+from loader import load_filtered_graph
+
+SNAPSHOT_NAME = "graph.snapshot"
+MAGIC = b"DEGSNAP1"
+VERSION = 1
+
+# Files the snapshot is built from
+SOURCES = ("people.csv", "movies.csv", "stars.csv")
+
+# CSR arrays stored in the snapshot
+ARRAYS = ("person_offsets", "person_movies", "movie_offsets", "movie_people")
+
+# String tables stored in the snapshot
+TABLES = ("person_ids", "person_names", "person_births",
+          "movie_ids", "movie_titles", "movie_years", "names")
+
+# Array data is aligned to this many bytes
+ALIGNMENT = 8
+
+
+def open_graph(directory, workers=None):
+    """
+    Returns the Graph for a dataset directory, loading it from
+    the snapshot when it is up to date, else from the CSV files
+    with the given number of worker processes.
+
+    Rows of the files that cannot be loaded are reported on stderr
+    when the snapshot is built.
+    """
+    graph = load_snapshot(directory)
+    if graph is None:
+        graph, report = load_filtered_graph(directory, workers=workers)
+        if report.rejected():
+            print(report, file=sys.stderr)
+        try:
+            save_snapshot(graph, directory)
+        except OSError:
+            pass
+    return graph
+
+
+def source_state(directory, with_hash):
+    """
+    Returns {file: {"size", "mtime", "sha1"}} for the CSV files,
+    where the hash is only computed when with_hash is set.
+    """
+    state = {}
+    for name in SOURCES:
+        path = os.path.join(directory, name)
+        stat = os.stat(path)
+        state[name] = {"size": stat.st_size, "mtime": stat.st_mtime_ns}
+        if with_hash:
+            state[name]["sha1"] = file_hash(path)
+    return state
+
+
+def file_hash(path):
+    sha1 = hashlib.sha1()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            sha1.update(block)
+    return sha1.hexdigest()
+
+
+def check_sources(directory, recorded):
+    """
+    Checks the recorded source state against the CSV files,
+    hashing only the files whose size or mtime has changed.
+
+    Returns (current, touched), where touched tells that some file
+    changed its size or mtime but not its contents. The recorded
+    size and mtime of those files are updated.
+    """
+    try:
+        current = source_state(directory, with_hash=False)
+    except OSError:
+        return False, False
+    touched = False
+    for name in SOURCES:
+        old, new = recorded.get(name), current[name]
+        if old is None:
+            return False, False
+        if old["size"] == new["size"] and old["mtime"] == new["mtime"]:
+            continue
+        if old["sha1"] != file_hash(os.path.join(directory, name)):
+            return False, False
+        old["size"], old["mtime"] = new["size"], new["mtime"]
+        touched = True
+    return True, touched
+
+
+def save_snapshot(graph, directory):
+    """
+    Writes the graph to the snapshot file of the directory.
+
+    The layout is the magic bytes, a little-endian header length,
+    a JSON header, the aligned raw arrays and a pickle of the tables.
+    """
+    header = {
+        "version": VERSION,
+        "type": INDEX_TYPE,
+        "sources": source_state(directory, with_hash=True),
+        "arrays": {},
+    }
+
+    # Lay out the arrays, leaving room for the header in front
+    chunks = []
+    position = 0
+    for name in ARRAYS:
+        data = getattr(graph, name).tobytes()
+        header["arrays"][name] = [position, len(data)]
+        padding = -len(data) % ALIGNMENT
+        chunks.append(data + bytes(padding))
+        position += len(data) + padding
+    tables = pickle.dumps({name: getattr(graph, name) for name in TABLES},
+                          protocol=pickle.HIGHEST_PROTOCOL)
+    header["tables"] = [position, len(tables)]
+    chunks.append(tables)
+
+    encoded = json.dumps(header).encode("utf-8")
+    prefix = MAGIC + struct.pack("<Q", len(encoded)) + encoded
+    prefix += bytes(-len(prefix) % ALIGNMENT)
+
+    # Write to a temporary file first so readers never see a partial file
+    path = os.path.join(directory, SNAPSHOT_NAME)
+    temporary = f"{path}.{os.getpid()}.tmp"
+    try:
+        with open(temporary, "wb") as f:
+            f.write(prefix)
+            for chunk in chunks:
+                f.write(chunk)
+        os.replace(temporary, path)
+    except BaseException:
+        try:
+            os.remove(temporary)
+        except OSError:
+            pass
+        raise
+
+
+def refresh_header(path, header):
+    """
+    Rewrites the header of a snapshot file in place, padded with
+    spaces to its old length. Returns False if it no longer fits.
+    """
+    length = header["length"]
+    encoded = json.dumps({key: value for key, value in header.items()
+                          if key != "length"}).encode("utf-8")
+    if len(encoded) > length:
+        return False
+    with open(path, "r+b") as f:
+        f.seek(len(MAGIC) + 8)
+        f.write(encoded + b" " * (length - len(encoded)))
+    return True
+
+
+def load_snapshot(directory):
+    """
+    Returns the Graph stored in the snapshot of the directory,
+    or None if there is no snapshot or it is out of date.
+    """
+    path = os.path.join(directory, SNAPSHOT_NAME)
+    try:
+        f = open(path, "rb")
+    except OSError:
+        return None
+    with f:
+        try:
+            buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            return None
+
+    header = read_header(buffer)
+    if header is None:
+        buffer.close()
+        return None
+    current, touched = check_sources(directory, header["sources"])
+    if not current:
+        buffer.close()
+        return None
+
+    # Data starts after the header, padded to the alignment
+    base = len(MAGIC) + 8 + header["length"]
+    base += -base % ALIGNMENT
+
+    graph = Graph()
+    view = memoryview(buffer)
+    for name, (start, size) in header["arrays"].items():
+        start += base
+        setattr(graph, name, view[start:start + size].cast(INDEX_TYPE))
+    start, size = header["tables"]
+    tables = pickle.loads(view[base + start:base + start + size])
+    for name in TABLES:
+        setattr(graph, name, tables[name])
+
+    graph.person_index = {person_id: index for index, person_id
+                          in enumerate(graph.person_ids)}
+    graph.movie_index = {movie_id: index for index, movie_id
+                         in enumerate(graph.movie_ids)}
+
+    # Keep the mapping alive for as long as the graph is
+    graph.snapshot = buffer
+
+    # Record the new mtimes, so the files are not hashed next time
+    if touched:
+        try:
+            if not refresh_header(path, header):
+                save_snapshot(graph, directory)
+        except OSError:
+            pass
+    return graph
+
+
+def read_header(buffer):
+    """Returns the decoded snapshot header, or None if not valid."""
+    if buffer[:len(MAGIC)] != MAGIC:
+        return None
+    (length,) = struct.unpack_from("<Q", buffer, len(MAGIC))
+    start = len(MAGIC) + 8
+    try:
+        header = json.loads(buffer[start:start + length].decode("utf-8"))
+    except ValueError:
+        return None
+    if header.get("version") != VERSION or header.get("type") != INDEX_TYPE:
+        return None
+    header["length"] = length
+    return header
@@ -0,0 +1,131 @@
+"""
+Bitboard Tic Tac Toe engine
+
+A position is a pair of 9-bit integers (x, o) holding the cells of
+each player, where cell (i, j) is bit 3 * i + j.
+"""
+
+X = "X"
+O = "O"
+
+# All nine cells
+FULL = 0b111111111
+
+# Bits of every row, column and diagonal
+WIN_MASKS = (
+    0b000000111, 0b000111000, 0b111000000,
+    0b001001001, 0b010010010, 0b100100100,
+    0b100010001, 0b001010100,
+)
+
+# Number of set bits and whether a winning line is held, per 9-bit value
+POPCOUNT = bytes(bin(bits).count("1") for bits in range(FULL + 1))
+WINNING = bytes(any(bits & mask == mask for mask in WIN_MASKS)
+                for bits in range(FULL + 1))
+
+# Maps positions to their minimax values
+values = {}
+
+
+def from_board(board):
+    """Returns the (x, o) bitboards of a list of lists board."""
+    x = o = 0
+    bit = 1
+    for row in board:
+        for cell in row:
+            if cell == X:
+                x |= bit
+            elif cell == O:
+                o |= bit
+            bit <<= 1
+    return x, o
+
+
+def to_board(x, o):
+    """Returns the list of lists board of (x, o) bitboards."""
+    board = []
+    for i in range(3):
+        row = []
+        for j in range(3):
+            bit = 1 << (3 * i + j)
+            row.append(X if x & bit else O if o & bit else None)
+        board.append(row)
+    return board
+
+
+def player(x, o):
+    """Returns the player who has the next turn."""
+    return O if POPCOUNT[x] > POPCOUNT[o] else X
+
+
+def actions(x, o):
+    """Yields the indices of the empty cells."""
+    empty = ~(x | o) & FULL
+    while empty:
+        bit = empty & -empty
+        yield bit.bit_length() - 1
+        empty ^= bit
+
+
+def play(x, o, cell):
+    """Returns the position after the next player takes a cell."""
+    bit = 1 << cell
+    if (x | o) & bit:
+        raise Exception("Not a valid action")
+    if POPCOUNT[x] > POPCOUNT[o]:
+        return x, o | bit
+    return x | bit, o
+
+
+def winner(x, o):
+    """Returns the winner of the position, if there is one."""
+    if WINNING[x]:
+        return X
+    if WINNING[o]:
+        return O
+    return None
+
+
+def terminal(x, o):
+    """Returns True if the game is over."""
+    return (x | o) == FULL or WINNING[x] or WINNING[o]
+
+
+def utility(x, o):
+    """Returns 1 if X has won, -1 if O has won, 0 otherwise."""
+    if WINNING[x]:
+        return 1
+    if WINNING[o]:
+        return -1
+    return 0
+
+
+def value(x, o):
+    """
+    Returns the minimax value of a position, memoized so that
+    every position is solved once per process.
+    """
+    key = (x, o)
+    if key in values:
+        return values[key]
+    if WINNING[x]:
+        result = 1
+    elif WINNING[o]:
+        result = -1
+    elif (x | o) == FULL:
+        result = 0
+    elif POPCOUNT[x] > POPCOUNT[o]:
+        result = min(value(x, o | 1 << cell) for cell in actions(x, o))
+    else:
+        result = max(value(x | 1 << cell, o) for cell in actions(x, o))
+    values[key] = result
+    return result
+
+
+def best_move(x, o):
+    """Returns the cell with the best minimax value for the next player."""
+    if terminal(x, o):
+        return None
+    if POPCOUNT[x] > POPCOUNT[o]:
+        return min(actions(x, o), key=lambda cell: value(x, o | 1 << cell))
+    return max(actions(x, o), key=lambda cell: value(x | 1 << cell, o))
@@ -0,0 +1,117 @@
+"""
+Tic Tac Toe opening book
+
+Every position reachable from the empty board is solved once and
+stored in a table of 3^9 bytes indexed by the board read as a base-3
+number, with an empty cell as 0, X as 1 and O as 2. Each byte holds
+the best move in the high bits and the minimax value plus one in the
+two low bits, or UNREACHABLE for positions that cannot occur.
+
+Usage: python book.py [file]
+"""
+
+import os
+import sys
+
+import bitboard
+
+MAGIC = b"TTTBOOK1"
+SIZE = 3 ** 9
+UNREACHABLE = 0xFF
+
+# Move stored for positions where the game is over
+NO_MOVE = 9
+
+BOOK_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                         "book.bin")
+
+# Table loaded by load()
+book = None
+
+
+def index(x, o):
+    """Returns the table index of a position."""
+    result = 0
+    for cell in reversed(range(9)):
+        result *= 3
+        if x >> cell & 1:
+            result += 1
+        elif o >> cell & 1:
+            result += 2
+    return result
+
+
+def generate():
+    """
+    Returns the table of every reachable position, solved with
+    the memoized minimax of the bitboard engine.
+    """
+    table = bytearray([UNREACHABLE]) * SIZE
+    stack = [(0, 0)]
+    while stack:
+        x, o = stack.pop()
+        i = index(x, o)
+        if table[i] != UNREACHABLE:
+            continue
+        move = bitboard.best_move(x, o)
+        value = bitboard.value(x, o)
+        table[i] = (NO_MOVE if move is None else move) << 2 | (value + 1)
+        if move is not None:
+            for cell in bitboard.actions(x, o):
+                stack.append(bitboard.play(x, o, cell))
+    return bytes(table)
+
+
+def save(table, path=BOOK_FILE):
+    with open(path, "wb") as f:
+        f.write(MAGIC + table)
+
+
+def load(path=BOOK_FILE):
+    """
+    Returns the table, read from the book file or generated and
+    written there if the file is missing or not valid.
+    """
+    global book
+    if book is not None:
+        return book
+    try:
+        with open(path, "rb") as f:
+            data = f.read()
+    except OSError:
+        data = b""
+    if data[:len(MAGIC)] == MAGIC and len(data) == len(MAGIC) + SIZE:
+        book = data[len(MAGIC):]
+    else:
+        book = generate()
+        try:
+            save(book, path)
+        except OSError:
+            pass
+    return book
+
+
+def lookup(x, o):
+    """
+    Returns (move, value) of a position, with a move of None when
+    the game is over. Raises ValueError for unreachable positions.
+    """
+    entry = load()[index(x, o)]
+    if entry == UNREACHABLE:
+        raise ValueError("position cannot be reached")
+    move = entry >> 2
+    return (None if move == NO_MOVE else move), (entry & 3) - 1
+
+
+def main():
+    if len(sys.argv) > 2:
+        sys.exit("Usage: python book.py [file]")
+    path = sys.argv[1] if len(sys.argv) == 2 else BOOK_FILE
+    table = generate()
+    save(table, path)
+    positions = SIZE - table.count(UNREACHABLE)
+    print(f"Solved {positions} positions into {path}.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,262 @@
+"""
+m,n,k-game engine
+
+Generalizes Tic Tac Toe to boards of m rows and n columns where k
+marks in a row, column or diagonal win. Positions are bitboards
+(x, o) with cell (i, j) at bit n * i + j. Boards that are too large
+to solve are searched by iterative deepening alpha-beta with a
+heuristic evaluation, a transposition table and a time budget.
+"""
+
+import time
+
+X = "X"
+O = "O"
+
+# Score of a won position, larger than any heuristic evaluation
+WIN = 1_000_000
+
+# Transposition table entries kept before the table is cleared
+TABLE_SIZE = 1 << 20
+
+# Transposition table entry flags
+EXACT, LOWER, UPPER = 0, 1, 2
+
+# Boards with more cells only search moves next to existing marks
+SMALL_BOARD = 16
+
+
+class Timeout(Exception):
+    """Raised inside a search when its time budget is used up."""
+
+
+class Game():
+    """
+    Precomputed lines and neighborhoods of an m x n board with k to win.
+    """
+
+    def __init__(self, m=3, n=3, k=3):
+        if not 1 <= k <= max(m, n):
+            raise ValueError("k must fit on the board")
+        self.m = m
+        self.n = n
+        self.k = k
+        self.full = (1 << (m * n)) - 1
+
+        # Every line of k cells, and the lines through every cell
+        self.lines = []
+        for i in range(m):
+            for j in range(n):
+                for di, dj in ((0, 1), (1, 0), (1, 1), (1, -1)):
+                    end_i, end_j = i + di * (k - 1), j + dj * (k - 1)
+                    if 0 <= end_i < m and 0 <= end_j < n:
+                        self.lines.append(sum(
+                            1 << self.cell(i + di * s, j + dj * s)
+                            for s in range(k)))
+        self.cell_lines = [[line for line in self.lines if line >> cell & 1]
+                           for cell in range(m * n)]
+
+        # Cells next to every cell, to only search moves near play
+        self.around = []
+        for i in range(m):
+            for j in range(n):
+                mask = 0
+                for a in range(max(i - 1, 0), min(i + 2, m)):
+                    for b in range(max(j - 1, 0), min(j + 2, n)):
+                        mask |= 1 << self.cell(a, b)
+                self.around.append(mask)
+
+        # Cells closer to the middle come first
+        middle_i, middle_j = (m - 1) / 2, (n - 1) / 2
+        self.order = sorted(range(m * n), key=lambda cell: (
+            abs(cell // n - middle_i) + abs(cell % n - middle_j), cell))
+
+        # Maps (x, o) to (depth, value, flag, best move), holding at
+        # most TABLE_SIZE entries
+        self.table = {}
+
+    def cell(self, i, j):
+        return self.n * i + j
+
+    def from_board(self, board):
+        """Returns the (x, o) bitboards of a list of lists board."""
+        x = o = 0
+        bit = 1
+        for row in board:
+            for cell in row:
+                if cell == X:
+                    x |= bit
+                elif cell == O:
+                    o |= bit
+                bit <<= 1
+        return x, o
+
+    def player(self, x, o):
+        """Returns the player who has the next turn."""
+        return O if bin(x).count("1") > bin(o).count("1") else X
+
+    def actions(self, x, o):
+        """Returns the empty cells, those closer to the middle first."""
+        taken = x | o
+        return [cell for cell in self.order if not taken >> cell & 1]
+
+    def wins(self, bits):
+        """Returns True if the bits hold a complete line."""
+        return any(bits & line == line for line in self.lines)
+
+    def winner(self, x, o):
+        """Returns the winner of the position, if there is one."""
+        if self.wins(x):
+            return X
+        if self.wins(o):
+            return O
+        return None
+
+    def terminal(self, x, o):
+        """Returns True if the game is over."""
+        return (x | o) == self.full or self.wins(x) or self.wins(o)
+
+    def loss(self, x, o):
+        """
+        Returns the score of a position lost by the player to move.
+
+        Losing with more empty cells left scores lower, so that wins
+        are taken as soon as possible and losses put off. The score
+        only depends on the position, never on the depth it was
+        searched at, so that the table can reuse it at any depth.
+        """
+        return -WIN - (self.m * self.n - bin(x | o).count("1"))
+
+    def evaluate(self, x, o):
+        """
+        Returns a heuristic score of a position for the player with
+        the x marks, counting the lines that only one player has marks
+        in, weighted by how many.
+        """
+        score = 0
+        for line in self.lines:
+            mine, theirs = x & line, o & line
+            if mine and not theirs:
+                score += 4 ** bin(mine).count("1")
+            elif theirs and not mine:
+                score -= 4 ** bin(theirs).count("1")
+        return score
+
+    def candidates(self, x, o, first=None):
+        """
+        Returns the moves worth searching, the given move first. On
+        large boards these are the empty cells next to a mark, or the
+        middle of an empty board.
+        """
+        taken = x | o
+        if self.m * self.n <= SMALL_BOARD:
+            moves = self.actions(x, o)
+        elif not taken:
+            return self.order[:1]
+        else:
+            near = 0
+            for cell in range(self.m * self.n):
+                if taken >> cell & 1:
+                    near |= self.around[cell]
+            near &= ~taken
+            moves = [cell for cell in self.order if near >> cell & 1]
+        if first in moves:
+            moves.remove(first)
+            moves.insert(0, first)
+        return moves
+
+    def negamax(self, x, o, depth, alpha, beta, last, deadline):
+        """
+        Returns the score of the position for the player to move,
+        searched depth moves ahead with alpha-beta pruning.
+
+        x holds the marks of the player to move and o those of the
+        other player, who made the last move.
+        """
+        if deadline is not None and time.perf_counter() > deadline:
+            raise Timeout()
+
+        # The previous move can only have won through its own lines
+        if last is not None and any(o & line == line
+                                    for line in self.cell_lines[last]):
+            return self.loss(x, o)
+        if (x | o) == self.full:
+            return 0
+        if depth == 0:
+            return self.evaluate(x, o)
+
+        original_alpha = alpha
+        entry = self.table.get((x, o))
+        best_move = None
+        if entry is not None:
+            entry_depth, value, flag, best_move = entry
+            if entry_depth >= depth:
+                if flag == EXACT:
+                    return value
+                if flag == LOWER:
+                    alpha = max(alpha, value)
+                else:
+                    beta = min(beta, value)
+                if alpha >= beta:
+                    return value
+
+        best = -WIN * 2
+        for cell in self.candidates(x, o, best_move):
+            value = -self.negamax(o, x | 1 << cell, depth - 1,
+                                  -beta, -alpha, cell, deadline)
+            if value > best:
+                best, best_move = value, cell
+            alpha = max(alpha, value)
+            if alpha >= beta:
+                break
+
+        if best <= original_alpha:
+            flag = UPPER
+        elif best >= beta:
+            flag = LOWER
+        else:
+            flag = EXACT
+        if len(self.table) >= TABLE_SIZE:
+            self.table.clear()
+        self.table[(x, o)] = (depth, best, flag, best_move)
+        return best
+
+    def deepen(self, x, o, deadline, max_depth=None):
+        """
+        Yields (depth, value, move) for every finished iteration of
+        an iterative deepening search, where value is the score for
+        the player to move, until the game is decided, max_depth or
+        every empty cell is reached, or the deadline passes.
+        """
+        empty = self.m * self.n - bin(x | o).count("1")
+        max_depth = empty if max_depth is None else min(max_depth, empty)
+
+        # Search from the point of view of the player to move
+        if self.player(x, o) == O:
+            x, o = o, x
+
+        for depth in range(1, max_depth + 1):
+            try:
+                value = self.negamax(x, o, depth, -WIN * 2, WIN * 2,
+                                     None, deadline)
+            except Timeout:
+                return
+            yield depth, value, self.table[(x, o)][3]
+            if abs(value) >= WIN:
+                return
+
+    def best_move(self, x, o, time_limit=1.0, max_depth=None):
+        """
+        Returns the best cell for the player to move found by iterative
+        deepening within time_limit seconds, or None if the game is over.
+
+        The move of the deepest finished iteration is returned, so the
+        search can be stopped at any time.
+        """
+        if self.terminal(x, o):
+            return None
+        deadline = time.perf_counter() + time_limit
+        best = self.candidates(x, o)[0]
+        for _, _, move in self.deepen(x, o, deadline, max_depth):
+            best = move
+        return best
@@ -0,0 +1,264 @@
+"""
+Parallel root-split search
+
+The subtrees below the root moves are searched in a pool of worker
+processes and their values are merged in the parent. When a large
+board has fewer root moves than workers, the split goes one move
+deeper. Ties are broken by the lowest cell so that the chosen move
+does not depend on which worker finishes first.
+
+Running the module checks the moves chosen on small boards against
+their exact values.
+
+Usage: python parallel.py [positions] [workers]
+"""
+
+import os
+import random
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import bitboard
+import mnk
+
+# Pool shared by the searches of this process, and its size
+pool = None
+pool_workers = None
+
+# Engine of the last board searched by this process, by (m, n, k)
+games = {}
+
+# Boards small enough to solve exactly, checked by main()
+CHECKED_SHAPES = [(3, 4, 3), (4, 3, 3), (4, 4, 3)]
+
+
+def get_pool(workers):
+    """Returns a process pool with the given number of workers."""
+    global pool, pool_workers
+    if pool is None or pool_workers != workers:
+        if pool is not None:
+            pool.shutdown()
+        pool = ProcessPoolExecutor(max_workers=workers)
+        pool_workers = workers
+    return pool
+
+
+def solve_child(x, o):
+    """Returns the exact minimax value of a 3x3 position."""
+    return bitboard.value(x, o)
+
+
+def best_classic_move(board, workers=None):
+    """
+    Returns the optimal (i, j) action on the classic 3x3 board,
+    solving the position after every root move in a worker.
+    """
+    x, o = bitboard.from_board(board)
+    if bitboard.terminal(x, o):
+        return None
+    maximizing = bitboard.player(x, o) == bitboard.X
+    cells = sorted(bitboard.actions(x, o))
+    children = [bitboard.play(x, o, cell) for cell in cells]
+
+    executor = get_pool(workers or os.cpu_count() or 1)
+    values = executor.map(solve_child, *zip(*children))
+
+    # Keep the first of equally good cells
+    best_cell, best_value = None, None
+    for cell, value in zip(cells, values):
+        if maximizing:
+            value = -value
+        if best_value is None or value < best_value:
+            best_cell, best_value = cell, value
+    return divmod(best_cell, 3)
+
+
+def shape_game(shape):
+    """Returns the engine of a board shape, keeping only the last one."""
+    if shape not in games:
+        games.clear()
+        games[shape] = mnk.Game(*shape)
+    return games[shape]
+
+
+def search_line(shape, x, o, seconds):
+    """
+    Searches the position after a line of moves by iterative deepening
+    for the given number of seconds.
+
+    Returns (values, exact) where values[d - 1] is the score at depth
+    d for the player to move, and exact tells that the last value
+    holds at any depth because the game is decided.
+    """
+    game = shape_game(shape)
+
+    # The previous move may have ended the game
+    if game.wins(x) or game.wins(o):
+        return [game.loss(x, o)], True
+    if (x | o) == game.full:
+        return [0], True
+
+    deadline = time.perf_counter() + seconds
+    values = [value for _, value, _ in game.deepen(x, o, deadline)]
+    empty = bin(~(x | o) & game.full).count("1")
+    exact = bool(values) and (abs(values[-1]) >= mnk.WIN
+                              or len(values) == empty)
+    return values, exact
+
+
+def value_at(result, depth):
+    """
+    Returns the value of a search_line result at a depth, or its
+    last value at any depth if it is exact.
+    """
+    values, exact = result
+    if exact:
+        return values[-1]
+    if depth <= len(values):
+        return values[depth - 1]
+    return None
+
+
+def best_mnk_move(board, k, time_limit, workers=None):
+    """
+    Returns the best (i, j) action on an m,n,k board found by splitting
+    the root moves, or the root and reply moves, over the workers
+    within time_limit seconds.
+    """
+    shape = (len(board), len(board[0]), k)
+    game = shape_game(shape)
+    x, o = game.from_board(board)
+    if game.terminal(x, o):
+        return None
+    workers = workers or os.cpu_count() or 1
+
+    # Lines of one move, or two when there are not enough for the workers
+    mover_is_x = game.player(x, o) == mnk.X
+    first_moves = sorted(game.candidates(x, o))
+    lines = [(cell,) for cell in first_moves]
+    if len(lines) < workers:
+        lines = []
+        for cell in first_moves:
+            after = play(x, o, cell, mover_is_x)
+            if game.terminal(*after):
+                lines.append((cell,))
+            else:
+                lines.extend((cell, reply) for reply
+                             in sorted(game.candidates(*after)))
+
+    positions = []
+    for line in lines:
+        position = (x, o)
+        for turn, cell in enumerate(line):
+            position = play(*position, cell, mover_is_x == (turn % 2 == 0))
+        positions.append(position)
+
+    # Every worker searches its share of the lines one after another
+    rounds = -(-len(lines) // workers)
+    seconds = time_limit / rounds
+    executor = get_pool(workers)
+    results = list(executor.map(
+        search_line, [shape] * len(lines), *zip(*positions),
+        [seconds] * len(lines)))
+
+    # Compare the lines that are not solved at the deepest depth all
+    # of them finished, counting a line that did not even finish depth
+    # 1 as a draw, and the solved lines by their exact values
+    unfinished = [len(values) for values, exact in results if not exact]
+    depth = max(min(unfinished), 1) if unfinished else 1
+
+    # Score every root move for the root mover
+    scores = {}
+    for line, result in zip(lines, results):
+        value = value_at(result, depth)
+        if value is None:
+            value = 0
+        if len(line) == 1:
+            score = -value
+        else:
+            score = value
+        root = line[0]
+        if len(line) == 1 or root not in scores:
+            scores[root] = score
+        else:
+            scores[root] = min(scores[root], score)
+
+    best_cell = max(sorted(scores), key=lambda cell: scores[cell])
+    return divmod(best_cell, game.n)
+
+
+def play(x, o, cell, x_moves):
+    """Returns the position after x or o takes a cell."""
+    if x_moves:
+        return x | 1 << cell, o
+    return x, o | 1 << cell
+
+
+def outcome(value):
+    """Returns 1, 0 or -1 for a won, drawn or lost exact value."""
+    return (value > 0) - (value < 0)
+
+
+def exact_outcomes(game, x, o):
+    """
+    Returns {cell: outcome for the player to move} of every move,
+    found by searching to the end of the game.
+    """
+    mover_is_x = game.player(x, o) == mnk.X
+    outcomes = {}
+    for cell in game.actions(x, o):
+        after_x, after_o = play(x, o, cell, mover_is_x)
+        if game.wins(after_x) or game.wins(after_o):
+            outcomes[cell] = 1
+            continue
+        empty = bin(~(after_x | after_o) & game.full).count("1")
+        mine, theirs = (after_o, after_x) if mover_is_x else \
+            (after_x, after_o)
+        value = game.negamax(mine, theirs, empty, -mnk.WIN * 2,
+                             mnk.WIN * 2, cell, None)
+        outcomes[cell] = -outcome(value)
+    return outcomes
+
+
+def random_position(game, rng):
+    """Returns a random position reached by legal play, not yet over."""
+    while True:
+        x = o = 0
+        for turn in range(rng.randrange(game.m * game.n - 1)):
+            cell = rng.choice(game.actions(x, o))
+            x, o = play(x, o, cell, turn % 2 == 0)
+            if game.terminal(x, o):
+                break
+        if not game.terminal(x, o):
+            return x, o
+
+
+def main():
+    if len(sys.argv) > 3:
+        sys.exit("Usage: python parallel.py [positions] [workers]")
+    positions = int(sys.argv[1]) if len(sys.argv) > 1 else 10
+    workers = int(sys.argv[2]) if len(sys.argv) > 2 else 2
+
+    rng = random.Random(0)
+    mistakes = 0
+    for shape in CHECKED_SHAPES:
+        game = mnk.Game(*shape)
+        for _ in range(positions):
+            x, o = random_position(game, rng)
+            board = [[mnk.X if x >> game.cell(i, j) & 1 else
+                      mnk.O if o >> game.cell(i, j) & 1 else None
+                      for j in range(game.n)] for i in range(game.m)]
+            i, j = best_mnk_move(board, shape[2], 1.0, workers)
+            outcomes = exact_outcomes(game, x, o)
+            if outcomes[game.cell(i, j)] < max(outcomes.values()):
+                mistakes += 1
+                print(f"{shape}: {(i, j)} is not optimal on {board}")
+    print(f"{mistakes} suboptimal moves in "
+          f"{positions * len(CHECKED_SHAPES)} positions.")
+    if mistakes:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
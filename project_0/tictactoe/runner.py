@@ -4,6 +4,12 @@ import time
 
 import tictactoe as ttt
 
+# Board rows, columns and marks in a row needed to win
+ROWS = 3
+COLUMNS = 3
+K = 3
+TILE_SIZE = min(80, 320 // max(ROWS, COLUMNS))
+
 pygame.init()
 size = width, height = 600, 400
 
@@ -15,10 +21,10 @@ screen = pygame.display.set_mode(size)
 
 mediumFont = pygame.font.Font("OpenSans-Regular.ttf", 28)
 largeFont = pygame.font.Font("OpenSans-Regular.ttf", 40)
-moveFont = pygame.font.Font("OpenSans-Regular.ttf", 60)
+moveFont = pygame.font.Font("OpenSans-Regular.ttf", TILE_SIZE * 3 // 4)
 
 user = None
-board = ttt.initial_state()
+board = ttt.initial_state(ROWS, COLUMNS)
 ai_turn = False
 
 while True:
@@ -67,13 +73,13 @@ while True:
     else:
 
         # Draw game board
-        tile_size = 80
-        tile_origin = (width / 2 - (1.5 * tile_size),
-                       height / 2 - (1.5 * tile_size))
+        tile_size = TILE_SIZE
+        tile_origin = (width / 2 - (COLUMNS / 2 * tile_size),
+                       height / 2 - (ROWS / 2 * tile_size))
         tiles = []
-        for i in range(3):
+        for i in range(ROWS):
             row = []
-            for j in range(3):
+            for j in range(COLUMNS):
                 rect = pygame.Rect(
                     tile_origin[0] + j * tile_size,
                     tile_origin[1] + i * tile_size,
@@ -89,12 +95,12 @@ while True:
                 row.append(rect)
             tiles.append(row)
 
-        game_over = ttt.terminal(board)
+        game_over = ttt.terminal(board, K)
         player = ttt.player(board)
 
         # Show title
         if game_over:
-            winner = ttt.winner(board)
+            winner = ttt.winner(board, K)
             if winner is None:
                 title = f"Game Over: Tie."
             else:
@@ -112,7 +118,7 @@ while True:
         if user != player and not game_over:
             if ai_turn:
                 time.sleep(0.5)
-                move = ttt.minimax(board)
+                move = ttt.minimax(board, k=K)
                 board = ttt.result(board, move)
                 ai_turn = False
             else:
@@ -122,8 +128,8 @@ while True:
         click, _, _ = pygame.mouse.get_pressed()
         if click == 1 and user == player and not game_over:
             mouse = pygame.mouse.get_pos()
-            for i in range(3):
-                for j in range(3):
+            for i in range(ROWS):
+                for j in range(COLUMNS):
                     if (board[i][j] == ttt.EMPTY and tiles[i][j].collidepoint(mouse)):
                         board = ttt.result(board, (i, j))
 
@@ -140,7 +146,7 @@ while True:
                 if againButton.collidepoint(mouse):
                     time.sleep(0.2)
                     user = None
-                    board = ttt.initial_state()
+                    board = ttt.initial_state(ROWS, COLUMNS)
                     ai_turn = False
 
     pygame.display.flip()
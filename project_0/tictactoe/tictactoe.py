@@ -3,48 +3,102 @@ Tic Tac Toe Player
 """
 
 import math
-import copy
+
+import bitboard
+import book
+import mnk
+import parallel
 
 X = "X"
 O = "O"
 EMPTY = None
 
+# Cell orders of the 8 rotations and reflections of the board
+SYMMETRIES = [
+    (0, 1, 2, 3, 4, 5, 6, 7, 8),
+    (6, 3, 0, 7, 4, 1, 8, 5, 2),
+    (8, 7, 6, 5, 4, 3, 2, 1, 0),
+    (2, 5, 8, 1, 4, 7, 0, 3, 6),
+    (2, 1, 0, 5, 4, 3, 8, 7, 6),
+    (6, 7, 8, 3, 4, 5, 0, 1, 2),
+    (0, 3, 6, 1, 4, 7, 2, 5, 8),
+    (8, 5, 2, 7, 4, 1, 6, 3, 0),
+]
+
+# Maps canonical board keys to their minimax values
+transpositions = {}
+
+# Actions tried first by alpha-beta search: center, corners, edges
+MOVE_ORDER = [(1, 1),
+              (0, 0), (0, 2), (2, 0), (2, 2),
+              (0, 1), (1, 0), (1, 2), (2, 1)]
+
+# Number of positions each search has visited
+nodes_visited = {"minimax": 0, "alpha_beta": 0}
+
+# Engine of the last board other than 3x3 with three in a row played,
+# by (m, n, k)
+games = {}
+
+# Seconds a move may take on boards too large to solve
+TIME_LIMIT = 1.0
+
 
-def initial_state():
+def initial_state(m=3, n=3):
     """
-    Returns starting state of the board.
+    Returns starting state of the board, with m rows and n columns.
     """
-    return [[EMPTY, EMPTY, EMPTY],
-            [EMPTY, EMPTY, EMPTY],
-            [EMPTY, EMPTY, EMPTY]]
+    return [[EMPTY] * n for _ in range(m)]
+
+
+def game(board, k):
+    """
+    Returns the m,n,k-game engine of the board, or None if it is
+    the classic 3x3 board with three in a row.
+    """
+    shape = (len(board), len(board[0]), k)
+    if shape == (3, 3, 3):
+        return None
+    if shape not in games:
+
+        # Drop the engine and table of a board no longer played
+        games.clear()
+        games[shape] = mnk.Game(*shape)
+    return games[shape]
+
+
+def is_classic(board):
+    """Returns True if the board has 3 rows and 3 columns."""
+    return len(board) == 3 and len(board[0]) == 3
 
 
 def player(board):
     """
     Returns player who has the next turn on a board.
     """
-    # count x and o in the board
-    board_1d = flat_board(board)
-    number_of_x = board_1d.count(X)
-    number_of_o = board_1d.count(O)
-
-    # return which player's turn it is
-    if number_of_x > number_of_o:
-        return O
-    else:
-        return X
+    x, o = bitboard.from_board(board)
+    if is_classic(board):
+        return bitboard.player(x, o)
+    return O if bin(x).count("1") > bin(o).count("1") else X
 
 
 def actions(board):
     """
     Returns set of all possible actions (i, j) available on the board.
     """
-    possible_actions = set()
-    for i in range(3):
-        for j in range(3):
-            if board[i][j] is None:
-                possible_actions.add((i, j))
-    return possible_actions
+    x, o = bitboard.from_board(board)
+    if is_classic(board):
+        return {divmod(cell, 3) for cell in bitboard.actions(x, o)}
+
+    # Walk the empty bits of larger boards the same way
+    width = len(board[0])
+    empty = ~(x | o) & ((1 << (len(board) * width)) - 1)
+    cells = set()
+    while empty:
+        bit = empty & -empty
+        cells.add(divmod(bit.bit_length() - 1, width))
+        empty ^= bit
+    return cells
 
 
 def result(board, action):
@@ -56,59 +110,30 @@ def result(board, action):
         raise Exception('Not a valid action')
 
     # return new board with player's move marked on it
-    result_board = copy.deepcopy(board)
-    player_mark = player(board)
-    result_board[action[0]][action[1]] = player_mark
+    if is_classic(board):
+        x, o = bitboard.from_board(board)
+        cell = 3 * action[0] + action[1]
+        return bitboard.to_board(*bitboard.play(x, o, cell))
+    result_board = [row[:] for row in board]
+    result_board[action[0]][action[1]] = player(board)
     return result_board
 
 
-def winner(board):
+def winner(board, k=3):
     """
-    Returns the winner of the game, if there is one.
+    Returns the winner of the game, with k in a row to win,
+    if there is one.
     """
-    # get list of winning rows
-    threes = winning_threes(board)
-
-    # check for the winner
-    for three in threes:
-        if None in three:
-            continue
-        if len(set(three)) == 1:
-            return three[0]
+    engine = game(board, k) or bitboard
+    return engine.winner(*bitboard.from_board(board))
 
-    return None
 
-
-def terminal(board):
+def terminal(board, k=3):
     """
     Returns True if game is over, False otherwise.
     """
-    # check if there are empty places on board
-    board_1d = flat_board(board)
-    if None not in board_1d:
-        return True
-
-    # check if there is a winner of the game
-    game_winner = winner(board)
-    if game_winner is not None:
-        return True
-
-    return False
-
-
-def winning_threes(board):
-    # winning rows
-    threes = board[:]
-    # winning columns
-    for i in range(3):
-        three = []
-        for row in board:
-            three.append(row[i])
-        threes.append(three)
-    # winning diagonals
-    threes.append([board[0][0], board[1][1], board[2][2]])
-    threes.append([board[0][2], board[1][1], board[2][0]])
-    return threes
+    engine = game(board, k) or bitboard
+    return bool(engine.terminal(*bitboard.from_board(board)))
 
 
 def flat_board(board):
@@ -116,11 +141,11 @@ def flat_board(board):
     return board_1d
 
 
-def utility(board):
+def utility(board, k=3):
     """
     Returns 1 if X has won the game, -1 if O has won, 0 otherwise.
     """
-    game_winner = winner(board)
+    game_winner = winner(board, k)
     if game_winner == X:
         return 1
     elif game_winner == O:
@@ -129,14 +154,45 @@ def utility(board):
         return 0
 
 
-def minimax(board):
+def minimax(board, alpha_beta=False, k=3, time_limit=TIME_LIMIT,
+            use_book=True, workers=None):
     """
     Returns the optimal action for the current player on the board.
+
+    Given a number of workers, the root moves are searched in
+    parallel by that many processes. Otherwise, other boards than
+    3x3 with three in a row get the best action an iterative
+    deepening search finds within time_limit seconds. On the 3x3
+    board, alpha_beta set to True searches with alpha-beta pruning
+    and ordered moves. Else the action is read from the opening book,
+    unless use_book is set to False or the book does not hold the
+    position, and found by the memoized full search when it is not.
     """
     # Check if current state is a terminal state
-    if terminal(board):
+    if terminal(board, k):
         return None
 
+    engine = game(board, k)
+    if workers is not None:
+        if engine is None:
+            return parallel.best_classic_move(board, workers)
+        return parallel.best_mnk_move(board, k, time_limit, workers)
+    if engine is not None:
+        cell = engine.best_move(*engine.from_board(board), time_limit)
+        return divmod(cell, engine.n)
+
+    if alpha_beta:
+        return alpha_beta_search(board)
+
+    # Positions that legal play cannot reach are not in the book
+    if use_book:
+        try:
+            cell, _ = book.lookup(*bitboard.from_board(board))
+        except ValueError:
+            pass
+        else:
+            return divmod(cell, 3)
+
     # Check current player
     current_player = player(board)
     # Create a dict with moves and values of the resulting states
@@ -158,18 +214,110 @@ def minimax(board):
 
 
 def max_value(state):
+    key = canonical_key(state)
+    if key in transpositions:
+        return transpositions[key]
+    nodes_visited["minimax"] += 1
+    if terminal(state):
+        v = utility(state)
+    else:
+        v = -math.inf
+        for action in actions(state):
+            v = max(v, min_value(result(state, action)))
+    transpositions[key] = v
+    return v
+
+
+def min_value(state):
+    key = canonical_key(state)
+    if key in transpositions:
+        return transpositions[key]
+    nodes_visited["minimax"] += 1
+    if terminal(state):
+        v = utility(state)
+    else:
+        v = math.inf
+        for action in actions(state):
+            v = min(v, max_value(result(state, action)))
+    transpositions[key] = v
+    return v
+
+
+def alpha_beta_search(board):
+    """
+    Returns the optimal action found by alpha-beta search, stopping
+    as soon as a move wins for the current player.
+    """
+    maximizing = player(board) == X
+    best_move = None
+    best = -math.inf if maximizing else math.inf
+    alpha, beta = -math.inf, math.inf
+
+    for action in ordered_actions(board):
+        new_board = result(board, action)
+        if maximizing:
+            v = alpha_beta_min(new_board, alpha, beta)
+            if v > best:
+                best, best_move = v, action
+            alpha = max(alpha, v)
+        else:
+            v = alpha_beta_max(new_board, alpha, beta)
+            if v < best:
+                best, best_move = v, action
+            beta = min(beta, v)
+
+        # Nothing beats a win
+        if best == (1 if maximizing else -1):
+            break
+
+    return best_move
+
+
+def alpha_beta_max(state, alpha, beta):
+    nodes_visited["alpha_beta"] += 1
     if terminal(state):
         return utility(state)
     v = -math.inf
-    for action in actions(state):
-        v = max(v, min_value(result(state, action)))
+    for action in ordered_actions(state):
+        v = max(v, alpha_beta_min(result(state, action), alpha, beta))
+        if v >= beta or v == 1:
+            return v
+        alpha = max(alpha, v)
     return v
 
 
-def min_value(state):
+def alpha_beta_min(state, alpha, beta):
+    nodes_visited["alpha_beta"] += 1
     if terminal(state):
         return utility(state)
     v = math.inf
-    for action in actions(state):
-        v = min(v, max_value(result(state, action)))
+    for action in ordered_actions(state):
+        v = min(v, alpha_beta_max(result(state, action), alpha, beta))
+        if v <= alpha or v == -1:
+            return v
+        beta = min(beta, v)
     return v
+
+
+def ordered_actions(board):
+    """
+    Returns the possible actions with the center first,
+    then the corners and then the edges.
+    """
+    return [action for action in MOVE_ORDER
+            if board[action[0]][action[1]] is EMPTY]
+
+
+def reset_counters():
+    """Sets the numbers of visited positions back to zero."""
+    for search in nodes_visited:
+        nodes_visited[search] = 0
+
+
+def canonical_key(board):
+    """
+    Returns the same string for a board and all its rotations and
+    reflections, which share one minimax value.
+    """
+    cells = "".join(cell or "-" for cell in flat_board(board))
+    return min("".join(cells[i] for i in symmetry) for symmetry in SYMMETRIES)
@@ -0,0 +1,179 @@
+"""
+Clause normal form compiler for logic sentences.
+
+Sentences are turned into clauses over integer numbered symbols,
+written DIMACS style: symbol n is the literal n, its negation is -n
+and a clause is a list of literals. Compound subsentences get a fresh
+variable defined by the Tseitin encoding, so the number of clauses
+grows linearly with the size of the sentence. Equal subsentences
+share one variable. Interned sentences of the dag module are compiled
+the same way, by their kind.
+"""
+
+import dag
+from logic import And, Biconditional, Implication, Not, Or, Symbol
+
+
+class CNF():
+    """
+    Set of clauses over integer variables, built up one
+    asserted sentence at a time.
+    """
+
+    def __init__(self):
+
+        # Maps symbol names to variables and back
+        self.variables = {}
+        self.names = [None]
+
+        # Variables of the compound subsentences already encoded
+        self.definitions = {}
+
+        self.clauses = []
+        self.true = None
+
+    @property
+    def size(self):
+        """Returns the number of variables in use."""
+        return len(self.names) - 1
+
+    def variable(self, name):
+        """Returns the variable of a symbol name, numbering new names."""
+        if name not in self.variables:
+            self.variables[name] = self.new_variable(name)
+        return self.variables[name]
+
+    def new_variable(self, name=None):
+        self.names.append(name)
+        return len(self.names) - 1
+
+    def constant(self, value):
+        """Returns a literal that is always true or always false."""
+        if self.true is None:
+            self.true = self.new_variable()
+            self.clauses.append([self.true])
+        return self.true if value else -self.true
+
+    def add(self, sentence):
+        """
+        Adds clauses that hold exactly when the sentence is true,
+        avoiding new variables for conjunctions and plain clauses.
+        """
+        if isinstance(sentence, dag.Node):
+            kind, children = sentence.kind, sentence.children
+        elif isinstance(sentence, And):
+            kind, children = dag.AND, sentence.conjuncts
+        elif isinstance(sentence, Or):
+            kind, children = dag.OR, sentence.disjuncts
+        else:
+            kind, children = None, ()
+
+        if kind == dag.AND:
+            for conjunct in children:
+                self.add(conjunct)
+        elif kind == dag.OR and all(is_literal(disjunct)
+                                    for disjunct in children):
+            self.clauses.append([self.literal(disjunct)
+                                 for disjunct in children])
+        else:
+            self.clauses.append([self.literal(sentence)])
+
+    def literal(self, sentence):
+        """
+        Returns a literal equivalent to the sentence, defining
+        a variable for it with Tseitin clauses if it is compound.
+        """
+        if isinstance(sentence, dag.Node):
+            return self.node_literal(sentence)
+        if isinstance(sentence, Symbol):
+            return self.variable(sentence.name)
+        if isinstance(sentence, Not):
+            return -self.literal(sentence.operand)
+        if sentence in self.definitions:
+            return self.definitions[sentence]
+
+        if isinstance(sentence, And):
+            literal = self.define_and(
+                [self.literal(conjunct) for conjunct in sentence.conjuncts])
+        elif isinstance(sentence, Or):
+            literal = -self.define_and(
+                [-self.literal(disjunct) for disjunct in sentence.disjuncts])
+        elif isinstance(sentence, Implication):
+            literal = -self.define_and([self.literal(sentence.antecedent),
+                                        -self.literal(sentence.consequent)])
+        elif isinstance(sentence, Biconditional):
+            literal = self.define_iff(self.literal(sentence.left),
+                                      self.literal(sentence.right))
+        else:
+            raise TypeError(f"cannot compile {type(sentence).__name__}")
+
+        self.definitions[sentence] = literal
+        return literal
+
+    def node_literal(self, node):
+        """Returns a literal equivalent to an interned sentence."""
+        if node.kind == dag.SYMBOL:
+            return self.variable(node.name)
+        if node.kind == dag.NOT:
+            return -self.literal(node.children[0])
+        if node in self.definitions:
+            return self.definitions[node]
+
+        literals = [self.literal(child) for child in node.children]
+        if node.kind == dag.AND:
+            literal = self.define_and(literals)
+        elif node.kind == dag.OR:
+            literal = -self.define_and([-child for child in literals])
+        elif node.kind == dag.IMPLIES:
+            literal = -self.define_and([literals[0], -literals[1]])
+        else:
+            literal = self.define_iff(*literals)
+
+        self.definitions[node] = literal
+        return literal
+
+    def define_and(self, literals):
+        """Returns a variable v with clauses for v <=> all literals."""
+        if not literals:
+            return self.constant(True)
+        if len(literals) == 1:
+            return literals[0]
+        v = self.new_variable()
+        for literal in literals:
+            self.clauses.append([-v, literal])
+        self.clauses.append([v] + [-literal for literal in literals])
+        return v
+
+    def define_iff(self, a, b):
+        """Returns a variable v with clauses for v <=> (a <=> b)."""
+        v = self.new_variable()
+        self.clauses.append([-v, -a, b])
+        self.clauses.append([-v, a, -b])
+        self.clauses.append([v, a, b])
+        self.clauses.append([v, -a, -b])
+        return v
+
+    def model(self, assignment):
+        """
+        Returns {symbol name: bool} for a sequence of booleans
+        indexed by variable, leaving out the Tseitin variables.
+        """
+        return {name: bool(assignment[variable])
+                for name, variable in self.variables.items()}
+
+
+def is_literal(sentence):
+    if isinstance(sentence, dag.Node):
+        return sentence.kind == dag.SYMBOL or (
+            sentence.kind == dag.NOT
+            and sentence.children[0].kind == dag.SYMBOL)
+    return isinstance(sentence, Symbol) or (
+        isinstance(sentence, Not) and isinstance(sentence.operand, Symbol))
+
+
+def to_cnf(*sentences):
+    """Returns the CNF of the conjunction of the sentences."""
+    cnf = CNF()
+    for sentence in sentences:
+        cnf.add(sentence)
+    return cnf
@@ -0,0 +1,237 @@
+"""
+Hash-consed logic sentences.
+
+Every distinct sentence exists once: building a sentence that equals
+one already alive returns the existing node, so equal subsentences
+are shared and a knowledge base is a DAG instead of a tree. Nodes are
+immutable and keep their hash and symbol set, computed once when they
+are built, and compare by identity.
+
+Nodes are sentences of the logic module, so model_check, compile and
+the cnf module work on them. intern() turns a sentence of the logic
+classes into a node and Node.sentence() turns it back.
+"""
+
+import weakref
+
+from logic import (And, Biconditional, Implication, Not, Or, Sentence,
+                   Symbol)
+
+SYMBOL = "symbol"
+NOT = "not"
+AND = "and"
+OR = "or"
+IMPLIES = "implies"
+IFF = "biconditional"
+
+# Maps (kind, name, children) to the node alive for it
+nodes = weakref.WeakValueDictionary()
+
+
+class Node(Sentence):
+    """
+    Immutable sentence: a symbol with a name or a connective of some
+    kind applied to a tuple of child nodes.
+    """
+
+    __slots__ = ("kind", "name", "children", "hash", "symbol_set",
+                 "__weakref__")
+
+    def __init__(self, kind, name, children):
+        set_attribute = object.__setattr__
+        set_attribute(self, "kind", kind)
+        set_attribute(self, "name", name)
+        set_attribute(self, "children", children)
+        set_attribute(self, "hash", hash((kind, name, children)))
+        if kind == SYMBOL:
+            symbol_set = frozenset([name])
+        elif len(children) == 1:
+            symbol_set = children[0].symbol_set
+        else:
+            symbol_set = frozenset().union(
+                *[child.symbol_set for child in children])
+        set_attribute(self, "symbol_set", symbol_set)
+
+    def __setattr__(self, name, value):
+        raise AttributeError("sentences are immutable")
+
+    def __delattr__(self, name):
+        raise AttributeError("sentences are immutable")
+
+    def __hash__(self):
+        return self.hash
+
+    def __repr__(self):
+        if self.kind == SYMBOL:
+            return self.name
+        children = ", ".join([str(child) for child in self.children])
+        return f"{CLASS_NAMES[self.kind]}({children})"
+
+    def evaluate(self, model):
+        kind = self.kind
+        if kind == SYMBOL:
+            try:
+                return bool(model[self.name])
+            except KeyError:
+                raise Exception(f"variable {self.name} not in model")
+        children = self.children
+        if kind == NOT:
+            return not children[0].evaluate(model)
+        if kind == AND:
+            return all(child.evaluate(model) for child in children)
+        if kind == OR:
+            return any(child.evaluate(model) for child in children)
+        if kind == IMPLIES:
+            return ((not children[0].evaluate(model))
+                    or children[1].evaluate(model))
+        return children[0].evaluate(model) == children[1].evaluate(model)
+
+    def formula(self):
+        kind = self.kind
+        if kind == SYMBOL:
+            return self.name
+        children = self.children
+        if kind == NOT:
+            return "¬" + Sentence.parenthesize(children[0].formula())
+        if kind in (AND, OR):
+            if len(children) == 1:
+                return children[0].formula()
+            separator = " ∧ " if kind == AND else " ∨  "
+            return separator.join([Sentence.parenthesize(child.formula())
+                                   for child in children])
+        if kind == IMPLIES:
+            antecedent = Sentence.parenthesize(children[0].formula())
+            consequent = Sentence.parenthesize(children[1].formula())
+            return f"{antecedent} => {consequent}"
+        left = Sentence.parenthesize(str(children[0]))
+        right = Sentence.parenthesize(str(children[1]))
+        return f"{left} <=> {right}"
+
+    def symbols(self):
+        return set(self.symbol_set)
+
+    def code(self, compiler):
+        kind = self.kind
+        if kind == SYMBOL:
+            return Symbol(self.name).code(compiler)
+        parts = [compiler.value(child) for child in self.children]
+        columns = compiler.model == "columns"
+        if kind == NOT:
+            return f"full ^ {parts[0]}" if columns else f"not {parts[0]}"
+        if kind == AND:
+            if columns:
+                return " & ".join(parts) or "full"
+            return " and ".join(parts) or "True"
+        if kind == OR:
+            if columns:
+                return " | ".join(parts) or "0"
+            return " or ".join(parts) or "False"
+        if kind == IMPLIES:
+            if columns:
+                return f"full ^ {parts[0]} | {parts[1]}"
+            return f"not {parts[0]} or {parts[1]}"
+        if columns:
+            return f"full ^ {parts[0]} ^ {parts[1]}"
+        return f"{parts[0]} == {parts[1]}"
+
+    def sentence(self, converted=None):
+        """
+        Returns the sentence built from the logic classes,
+        with shared nodes turned into shared objects.
+        """
+        if converted is None:
+            converted = {}
+        if self in converted:
+            return converted[self]
+        if self.kind == SYMBOL:
+            result = Symbol(self.name)
+        else:
+            children = [child.sentence(converted) for child in self.children]
+            result = CLASSES[self.kind](*children)
+        converted[self] = result
+        return result
+
+
+def node(kind, name=None, children=()):
+    """Returns the node for a kind, name and children, building it once."""
+    for child in children:
+        if not isinstance(child, Node):
+            raise TypeError("must be an interned sentence")
+    key = (kind, name, children)
+    result = nodes.get(key)
+    if result is None:
+        result = Node(kind, name, children)
+        nodes[key] = result
+    return result
+
+
+def symbol(name):
+    return node(SYMBOL, name)
+
+
+def negation(operand):
+    return node(NOT, children=(operand,))
+
+
+def conjunction(*conjuncts):
+    return node(AND, children=conjuncts)
+
+
+def disjunction(*disjuncts):
+    return node(OR, children=disjuncts)
+
+
+def implication(antecedent, consequent):
+    return node(IMPLIES, children=(antecedent, consequent))
+
+
+def biconditional(left, right):
+    return node(IFF, children=(left, right))
+
+
+def intern(sentence, converted=None):
+    """
+    Returns the node of a sentence of the logic classes,
+    converting every subsentence object only once.
+    """
+    if isinstance(sentence, Node):
+        return sentence
+    if converted is None:
+        converted = {}
+    key = id(sentence)
+    if key in converted:
+        return converted[key][1]
+
+    if isinstance(sentence, Symbol):
+        result = symbol(sentence.name)
+    elif isinstance(sentence, Not):
+        result = negation(intern(sentence.operand, converted))
+    elif isinstance(sentence, And):
+        result = conjunction(*[intern(conjunct, converted)
+                               for conjunct in sentence.conjuncts])
+    elif isinstance(sentence, Or):
+        result = disjunction(*[intern(disjunct, converted)
+                               for disjunct in sentence.disjuncts])
+    elif isinstance(sentence, Implication):
+        result = implication(intern(sentence.antecedent, converted),
+                             intern(sentence.consequent, converted))
+    elif isinstance(sentence, Biconditional):
+        result = biconditional(intern(sentence.left, converted),
+                               intern(sentence.right, converted))
+    else:
+        raise TypeError(f"cannot intern {type(sentence).__name__}")
+
+    # Keep the sentence alive so that its id is not reused
+    converted[key] = (sentence, result)
+    return result
+
+
+CLASSES = {
+    NOT: Not,
+    AND: And,
+    OR: Or,
+    IMPLIES: Implication,
+    IFF: Biconditional,
+}
+
+CLASS_NAMES = {kind: cls.__name__ for kind, cls in CLASSES.items()}
@@ -0,0 +1,82 @@
+"""
+Knowledge base that keeps its compiled clauses between queries.
+
+Sentences are compiled to clauses once, when they are added, and fed
+to one solver that lives as long as the knowledge base. Every query
+only adds the clauses of the query itself. What earlier queries found
+is kept: literals shown to be entailed are added to the solver as
+unit clauses, and the models found while refuting queries answer
+later queries that are false in one of them without a search.
+"""
+
+from cnf import CNF
+from sat import Solver
+
+
+class KnowledgeBase():
+    """
+    Sentences asserted so far, answering entailment queries
+    with a solver that is reused across them.
+    """
+
+    def __init__(self, *sentences):
+        self.cnf = CNF()
+        self.solver = Solver()
+
+        # Number of clauses of the CNF already given to the solver
+        self.fed = 0
+
+        # Variables known to be entailed true (1) or false (-1)
+        self.backbone = {}
+
+        # Models of the knowledge base found by earlier queries
+        self.models = []
+
+        self.searches = 0
+
+        for sentence in sentences:
+            self.add(sentence)
+
+    def add(self, sentence):
+        """Asserts one more sentence."""
+        self.cnf.add(sentence)
+        self.feed()
+
+        # The new sentence may be false in the models seen so far
+        self.models = []
+
+    def feed(self):
+        """Gives the clauses added to the CNF since last time to the solver."""
+        clauses = self.cnf.clauses
+        while self.fed < len(clauses):
+            self.solver.add_clause(clauses[self.fed])
+            self.fed += 1
+
+    def entails(self, query):
+        """Checks if the knowledge base entails query."""
+        literal = self.cnf.literal(query)
+        self.feed()
+        if self.solver.inconsistent:
+            return True
+
+        # Answered by earlier queries
+        if self.backbone.get(abs(literal)) == (1 if literal > 0 else -1):
+            return True
+        names = query.symbols()
+        for model in self.models:
+            if names <= model.keys() and not query.evaluate(model):
+                return False
+
+        self.searches += 1
+        if self.solver.solve([-literal]):
+            self.models.append(self.cnf.model(self.solver.model))
+            return False
+
+        # Nothing can make the query false, so it can be assumed from now on
+        self.backbone[abs(literal)] = 1 if literal > 0 else -1
+        self.solver.add_clause([literal])
+        return True
+
+    def entailed(self, queries):
+        """Returns the queries that the knowledge base entails."""
+        return [query for query in queries if self.entails(query)]
@@ -1,8 +1,14 @@
 import itertools
 
+# Models evaluated at once by bitwise_check are 2 ** CHUNK_SYMBOLS
+CHUNK_SYMBOLS = 12
+
 
 class Sentence():
 
+    # Lets subclasses that define __slots__ go without a __dict__
+    __slots__ = ()
+
     def evaluate(self, model):
         """Evaluates the logical sentence."""
         raise Exception("nothing to evaluate")
@@ -15,6 +21,33 @@ class Sentence():
         """Returns a set of all symbols in the logical sentence."""
         return set()
 
+    def code(self, compiler):
+        """
+        Returns a Python expression computing the sentence from the
+        local variables that the compiler assigned to its parts.
+        """
+        raise Exception("nothing to compile")
+
+    def compile(self, names=None, bitmask=True):
+        """
+        Returns a function evaluating the sentence on a model given as
+        an int whose bit i is the value of names[i], or as a sequence
+        of bools with bitmask set to False, and the list of names.
+        """
+        if names is None:
+            names = sorted(self.symbols())
+        model = "bits" if bitmask else "cells"
+        return Compiler(names, model).function(self, model), list(names)
+
+    def compile_columns(self, names):
+        """
+        Returns a function of (columns, full) evaluating the sentence
+        in many models at once, where columns[i] holds the values of
+        names[i] in the models set in full.
+        """
+        compiler = Compiler(names, "columns")
+        return compiler.function(self, "columns, full")
+
     @classmethod
     def validate(cls, sentence):
         if not isinstance(sentence, Sentence):
@@ -68,6 +101,17 @@ class Symbol(Sentence):
     def symbols(self):
         return {self.name}
 
+    def code(self, compiler):
+        try:
+            i = compiler.variables[self.name]
+        except KeyError:
+            raise Exception(f"variable {self.name} not in model")
+        if compiler.model == "bits":
+            return f"bits >> {i} & 1 == 1"
+        if compiler.model == "columns":
+            return f"columns[{i}]"
+        return f"bool(cells[{i}])"
+
 
 class Not(Sentence):
     def __init__(self, operand):
@@ -92,6 +136,12 @@ class Not(Sentence):
     def symbols(self):
         return self.operand.symbols()
 
+    def code(self, compiler):
+        operand = compiler.value(self.operand)
+        if compiler.model == "columns":
+            return f"full ^ {operand}"
+        return f"not {operand}"
+
 
 class And(Sentence):
     def __init__(self, *conjuncts):
@@ -129,6 +179,12 @@ class And(Sentence):
     def symbols(self):
         return set.union(*[conjunct.symbols() for conjunct in self.conjuncts])
 
+    def code(self, compiler):
+        conjuncts = [compiler.value(conjunct) for conjunct in self.conjuncts]
+        if compiler.model == "columns":
+            return " & ".join(conjuncts) or "full"
+        return " and ".join(conjuncts) or "True"
+
 
 class Or(Sentence):
     def __init__(self, *disjuncts):
@@ -160,6 +216,12 @@ class Or(Sentence):
     def symbols(self):
         return set.union(*[disjunct.symbols() for disjunct in self.disjuncts])
 
+    def code(self, compiler):
+        disjuncts = [compiler.value(disjunct) for disjunct in self.disjuncts]
+        if compiler.model == "columns":
+            return " | ".join(disjuncts) or "0"
+        return " or ".join(disjuncts) or "False"
+
 
 class Implication(Sentence):
     def __init__(self, antecedent, consequent):
@@ -191,6 +253,13 @@ class Implication(Sentence):
     def symbols(self):
         return set.union(self.antecedent.symbols(), self.consequent.symbols())
 
+    def code(self, compiler):
+        antecedent = compiler.value(self.antecedent)
+        consequent = compiler.value(self.consequent)
+        if compiler.model == "columns":
+            return f"full ^ {antecedent} | {consequent}"
+        return f"not {antecedent} or {consequent}"
+
 
 class Biconditional(Sentence):
     def __init__(self, left, right):
@@ -224,9 +293,79 @@ class Biconditional(Sentence):
     def symbols(self):
         return set.union(self.left.symbols(), self.right.symbols())
 
-
-def model_check(knowledge, query):
-    """Checks if knowledge base entails query."""
+    def code(self, compiler):
+        left = compiler.value(self.left)
+        right = compiler.value(self.right)
+        if compiler.model == "columns":
+            return f"full ^ {left} ^ {right}"
+        return f"{left} == {right}"
+
+
+class Compiler():
+    """
+    Writes a sentence as straight-line Python code, with one
+    assignment to a local variable per subsentence, so that deeply
+    nested sentences compile without nested expressions. A subsentence
+    shared by several parents, as in the DAGs of the dag module, is
+    computed once and its variable reused.
+
+    Symbols are read from a model that is an int bitmask ("bits"),
+    a sequence of bools ("cells") or, with "columns", a sequence of
+    ints whose bit j is the value of the symbol in the j-th of many
+    models, with the bits of all models set in "full".
+    """
+
+    def __init__(self, names, model):
+        self.variables = {name: i for i, name in enumerate(names)}
+        self.model = model
+        self.lines = []
+
+        # Maps the id of a subsentence already written to the sentence,
+        # kept alive so that its id is not reused, and its variable
+        self.written = {}
+
+    def value(self, sentence):
+        """Returns the local variable holding the value of a sentence."""
+        key = id(sentence)
+        if key in self.written:
+            return self.written[key][1]
+        code = sentence.code(self)
+        name = f"v{len(self.lines)}"
+        self.lines.append(f"    {name} = {code}")
+        self.written[key] = (sentence, name)
+        return name
+
+    def function(self, sentence, arguments):
+        """Returns a function of the arguments computing the sentence."""
+        result = self.value(sentence)
+        source = "\n".join([f"def evaluate({arguments}):"] + self.lines +
+                           [f"    return {result}", ""])
+        namespace = {}
+        exec(source, namespace)
+        return namespace["evaluate"]
+
+
+def model_check(knowledge, query, method="enumerate"):
+    """
+    Checks if knowledge base entails query.
+
+    The "enumerate" method checks every model and "compiled" does the
+    same with both sentences compiled to functions of a bitmask. The
+    "bitwise" method evaluates them in thousands of models at once
+    with the models packed into the bits of an int. The "sat" method
+    asks a DPLL solver whether knowledge and not query can both be
+    true.
+    """
+    if method == "sat":
+        # Imported here since the solver builds on this module
+        from sat import entails
+        return entails(knowledge, query)
+    elif method == "compiled":
+        return compiled_check(knowledge, query)
+    elif method == "bitwise":
+        return bitwise_check(knowledge, query)
+    elif method != "enumerate":
+        raise ValueError(f"unknown model checking method {method}")
 
     def check_all(knowledge, query, symbols, model):
         """Checks if knowledge base entails query, given a particular model."""
@@ -261,3 +400,52 @@ def model_check(knowledge, query):
 
     # Check that knowledge entails query
     return check_all(knowledge, query, symbols, dict())
+
+
+def compiled_check(knowledge, query):
+    """
+    Checks if knowledge base entails query by running both compiled
+    sentences over every model, numbered as bitmasks.
+    """
+    names = sorted(set.union(knowledge.symbols(), query.symbols()))
+    knowledge_holds, _ = knowledge.compile(names)
+    query_holds, _ = query.compile(names)
+    for bits in range(1 << len(names)):
+        if knowledge_holds(bits) and not query_holds(bits):
+            return False
+    return True
+
+
+def bitwise_check(knowledge, query):
+    """
+    Checks if knowledge base entails query by evaluating both over
+    chunks of models packed into ints, stopping at the first chunk
+    with a model of knowledge where query is false.
+
+    Model j of a chunk gives the first symbols the bits of j and the
+    remaining symbols the bits of the chunk number.
+    """
+    names = sorted(set.union(knowledge.symbols(), query.symbols()))
+    knowledge_column = knowledge.compile_columns(names)
+    query_column = query.compile_columns(names)
+
+    # Columns of the symbols that vary within a chunk
+    width = min(len(names), CHUNK_SYMBOLS)
+    size = 1 << width
+    full = (1 << size) - 1
+    low = []
+    for i in range(width):
+        run = 1 << i
+        column = ((1 << run) - 1) << run
+        period = run * 2
+        while period < size:
+            column |= column << period
+            period *= 2
+        low.append(column)
+
+    for chunk in range(1 << (len(names) - width)):
+        columns = low + [full if chunk >> i & 1 else 0
+                         for i in range(len(names) - width)]
+        if knowledge_column(columns, full) & ~query_column(columns, full):
+            return False
+    return True
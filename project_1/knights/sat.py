@@ -0,0 +1,238 @@
+"""
+DPLL satisfiability solver for clauses built by the cnf module.
+
+Unit propagation uses two watched literals per clause, so only the
+clauses watching a literal that just became false are looked at and
+nothing has to be undone when backtracking. Pure literals are set
+before every search. Clauses can be added between calls to solve,
+and solve takes assumptions that only hold for that call.
+"""
+
+from cnf import to_cnf
+
+
+class Solver():
+    """
+    DPLL solver over variables 1..size with watched literals.
+    """
+
+    def __init__(self, clauses=(), size=0):
+
+        # Value of every variable: 1 true, -1 false, 0 unassigned
+        self.values = [0] * (size + 1)
+
+        self.clauses = []
+        self.watches = {}
+
+        # Assigned literals in order and how many were propagated
+        self.trail = []
+        self.head = 0
+
+        # Set once a clause that can never be satisfied was added
+        self.inconsistent = False
+
+        # Number of clauses every variable appears in, for branching
+        self.occurrences = [0] * (size + 1)
+
+        self.model = None
+        self.decisions = 0
+
+        for clause in clauses:
+            self.add_clause(clause)
+
+    def grow(self, size):
+        """Makes room for variables up to size."""
+        while len(self.values) <= size:
+            self.values.append(0)
+            self.occurrences.append(0)
+
+    def value(self, literal):
+        """Returns 1 if a literal is true, -1 if false, 0 if unassigned."""
+        value = self.values[abs(literal)]
+        return value if literal > 0 else -value
+
+    def assign(self, literal):
+        self.values[abs(literal)] = 1 if literal > 0 else -1
+        self.trail.append(literal)
+
+    def undo(self, length):
+        """Unassigns the literals of the trail after its first length."""
+        values = self.values
+        trail = self.trail
+        while len(trail) > length:
+            values[abs(trail.pop())] = 0
+        self.head = min(self.head, length)
+
+    def add_clause(self, clause):
+        """
+        Adds a clause, simplified by the values fixed for good.
+        Must not be called in the middle of a search.
+        """
+        if self.inconsistent:
+            return
+        literals = []
+        for literal in clause:
+            self.grow(abs(literal))
+            if -literal in literals or self.value(literal) == 1:
+                return
+            if literal not in literals and self.value(literal) == 0:
+                literals.append(literal)
+
+        if not literals:
+            self.inconsistent = True
+            return
+        for literal in literals:
+            self.occurrences[abs(literal)] += 1
+        if len(literals) == 1:
+            self.assign(literals[0])
+            if self.propagate() is not None:
+                self.inconsistent = True
+            return
+
+        index = len(self.clauses)
+        self.clauses.append(literals)
+        self.watches.setdefault(literals[0], []).append(index)
+        self.watches.setdefault(literals[1], []).append(index)
+
+    def propagate(self):
+        """
+        Sets the literals forced by unit clauses.
+        Returns a conflicting clause, or None.
+        """
+        values = self.values
+        clauses = self.clauses
+        watches = self.watches
+        trail = self.trail
+
+        while self.head < len(trail):
+            false_literal = -trail[self.head]
+            self.head += 1
+            watchers = watches.get(false_literal)
+            if not watchers:
+                continue
+
+            kept = []
+            for position, index in enumerate(watchers):
+                clause = clauses[index]
+
+                # Keep the false literal second
+                if clause[0] == false_literal:
+                    clause[0], clause[1] = clause[1], clause[0]
+                first = clause[0]
+                first_value = values[abs(first)]
+                if first < 0:
+                    first_value = -first_value
+                if first_value == 1:
+                    kept.append(index)
+                    continue
+
+                # Look for another literal to watch
+                for k in range(2, len(clause)):
+                    literal = clause[k]
+                    value = values[abs(literal)]
+                    if (value if literal > 0 else -value) != -1:
+                        clause[1], clause[k] = literal, false_literal
+                        watches.setdefault(literal, []).append(index)
+                        break
+                else:
+                    kept.append(index)
+                    if first_value == -1:
+                        kept.extend(watchers[position + 1:])
+                        watches[false_literal] = kept
+                        return clause
+                    self.assign(first)
+
+            watches[false_literal] = kept
+        return None
+
+    def pure_literals(self):
+        """
+        Sets every unassigned variable that only appears with one
+        sign in the clauses not yet satisfied.
+        """
+        signs = {}
+        for clause in self.clauses:
+            if any(self.value(literal) == 1 for literal in clause):
+                continue
+            for literal in clause:
+                if self.value(literal) == 0:
+                    variable = abs(literal)
+                    signs[variable] = signs.get(variable, 0) | \
+                        (1 if literal > 0 else 2)
+        for variable, sign in signs.items():
+            if sign == 1:
+                self.assign(variable)
+            elif sign == 2:
+                self.assign(-variable)
+
+    def choose(self):
+        """Returns the unassigned variable in most clauses, or None."""
+        best, best_count = None, -1
+        for variable in range(1, len(self.values)):
+            if self.values[variable] == 0 and \
+                    self.occurrences[variable] > best_count:
+                best, best_count = variable, self.occurrences[variable]
+        return best
+
+    def solve(self, assumptions=()):
+        """
+        Returns True if the clauses and assumed literals can all be
+        true, keeping a satisfying assignment in self.model.
+        """
+        self.model = None
+        if self.inconsistent:
+            return False
+        for literal in assumptions:
+            self.grow(abs(literal))
+        base = len(self.trail)
+        try:
+            return self.search(assumptions)
+        finally:
+            self.undo(base)
+
+    def search(self, assumptions):
+        for literal in assumptions:
+            value = self.value(literal)
+            if value == -1:
+                return False
+            if value == 0:
+                self.assign(literal)
+        if self.propagate() is not None:
+            return False
+        self.pure_literals()
+
+        # Decisions as (trail length before, literal, both tried)
+        decisions = []
+        while True:
+            if self.propagate() is not None:
+
+                # Backtrack to the last decision with a branch left
+                while decisions:
+                    length, literal, flipped = decisions.pop()
+                    self.undo(length)
+                    if not flipped:
+                        decisions.append((length, -literal, True))
+                        self.assign(-literal)
+                        break
+                else:
+                    return False
+                continue
+
+            variable = self.choose()
+            if variable is None:
+                self.model = [value == 1 for value in self.values]
+                return True
+            self.decisions += 1
+            decisions.append((len(self.trail), variable, False))
+            self.assign(variable)
+
+
+def entails(knowledge, query):
+    """
+    Checks if knowledge base entails query by showing that
+    knowledge and not query cannot both be true.
+    """
+    cnf = to_cnf(knowledge)
+    literal = cnf.literal(query)
+    solver = Solver(cnf.clauses, cnf.size)
+    return not solver.solve([-literal])
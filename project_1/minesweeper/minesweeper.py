@@ -1,6 +1,8 @@
 import itertools
 import random
 
+import probability
+
 
 class Minesweeper():
     """
@@ -134,14 +136,23 @@ class Sentence():
 class MinesweeperAI():
     """
     Minesweeper game player
+
+    Sentences are kept by their set of cells and indexed by every
+    cell they mention, so marking a cell only updates the sentences
+    about it and new sentences are only compared with the sentences
+    they share a cell with. Sentences that are solved, empty or
+    already known are not kept.
     """
 
-    def __init__(self, height=8, width=8):
+    def __init__(self, height=8, width=8, mines=None):
 
         # Set initial height and width
         self.height = height
         self.width = width
 
+        # Number of mines on the board, if it is known
+        self.total_mines = mines
+
         # Keep track of which cells have been clicked on
         self.moves_made = set()
 
@@ -149,26 +160,97 @@ class MinesweeperAI():
         self.mines = set()
         self.safes = set()
 
-        # List of sentences about the game known to be true
-        self.knowledge = []
+        # Safe cells that have not been clicked on yet
+        self.safe_moves = set()
+
+        # Sentences about the game known to be true, by their cells
+        self.sentences = {}
+
+        # Maps every cell to the cells of the sentences mentioning it
+        self.index = {}
+
+        # Cells of sentences that still have to be compared with others
+        self.pending = []
+
+        # Cells found to be mines (True) or safe (False), still to mark
+        self.marks = []
+
+    @property
+    def knowledge(self):
+        """List of sentences about the game known to be true."""
+        return list(self.sentences.values())
 
     def mark_mine(self, cell):
         """
         Marks a cell as a mine, and updates all knowledge
         to mark that cell as a mine as well.
         """
-        self.mines.add(cell)
-        for sentence in self.knowledge:
-            sentence.mark_mine(cell)
+        self.marks.append((cell, True))
+        self.settle()
 
     def mark_safe(self, cell):
         """
         Marks a cell as safe, and updates all knowledge
         to mark that cell as safe as well.
         """
-        self.safes.add(cell)
-        for sentence in self.knowledge:
-            sentence.mark_safe(cell)
+        self.marks.append((cell, False))
+        self.settle()
+
+    def settle(self):
+        """
+        Marks the queued cells one after another, including the cells
+        of the sentences that marking them solves.
+        """
+        while self.marks:
+            cell, mine = self.marks.pop()
+            if mine:
+                self.mines.add(cell)
+            else:
+                self.safes.add(cell)
+                if cell not in self.moves_made:
+                    self.safe_moves.add(cell)
+
+            # Rewrite the sentences about the cell without it
+            while cell in self.index:
+                key = next(iter(self.index[cell]))
+                sentence = self.remove(key)
+                if mine:
+                    sentence.mark_mine(cell)
+                else:
+                    sentence.mark_safe(cell)
+                self.insert(sentence)
+
+    def remove(self, key):
+        """Removes the sentence about a set of cells from the index."""
+        sentence = self.sentences.pop(key)
+        for cell in key:
+            keys = self.index.get(cell)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self.index[cell]
+        return sentence
+
+    def insert(self, sentence):
+        """
+        Adds a sentence to the knowledge base, queueing its cells to be
+        marked if it is solved and dropping it if it is empty or known.
+        """
+        if not sentence.cells:
+            return
+        if sentence.count == 0:
+            self.marks.extend((cell, False) for cell in sentence.cells)
+            return
+        if sentence.count == len(sentence.cells):
+            self.marks.extend((cell, True) for cell in sentence.cells)
+            return
+        key = frozenset(sentence.cells)
+        if key in self.sentences:
+            return
+        self.sentences[key] = sentence
+        for cell in key:
+            self.index.setdefault(cell, set()).add(key)
+        self.pending.append(key)
 
     def add_knowledge(self, cell, count):
         """
@@ -187,6 +269,7 @@ class MinesweeperAI():
         """
         # Mark the cell as a move that has been made
         self.moves_made.add(cell)
+        self.safe_moves.discard(cell)
 
         # Mark the cell as safe
         self.mark_safe(cell)
@@ -194,49 +277,34 @@ class MinesweeperAI():
         # Add a new sentence to the AI's knowledge base
         self.new_sentence(cell, count)
 
-        # Search for new inferences that can be draw from
-        # the current AI's knowledge base
-        while True:
-
-            # Set flag as false, knowledge base not changed
-            knowledge_changed = False
-
-            # Keep looking for additional safe cells or mines
-            while True:
-                new_mines_found = self.safe_fields_and_mines_check()
-
-                # Break if no mines have been found
-                if not new_mines_found:
-                    break
-
-            # Add new sentence to knowledge base if possible
-            # Iterate through current AI's knowledge base
-            current_knowledge = self.knowledge[:]
-            for sentence in current_knowledge:
-                if not sentence.cells:  # Skip if empty set
-                    continue
-                for other_sentence in current_knowledge:
-
-                    # Check if subset
-                    if sentence.cells < other_sentence.cells:
-
-                        # Calculate difference between sets
-                        new_cells = other_sentence.cells - sentence.cells
-
-                        # Check if set is not already in knowledge base
-                        if new_cells in (s.cells for s in self.knowledge):
-                            continue
-
-                        # Create new Sentence and add it to knowledge base
-                        new_count = other_sentence.count - sentence.count
-                        self.knowledge.append(Sentence(new_cells, new_count))
-
-                        # Set flag as true
-                        knowledge_changed = True
-
-            # Break if knowledge base has not been changed
-            if not knowledge_changed:
+        # Mark the cells of solved sentences and compare every new or
+        # changed sentence with the sentences sharing a cell with it,
+        # until nothing more can be inferred
+        while self.marks or self.pending:
+            self.settle()
+            if not self.pending:
                 break
+            key = self.pending.pop()
+            sentence = self.sentences.get(key)
+            if sentence is None:
+                continue
+            others = set()
+            for cell in key:
+                others.update(self.index[cell])
+            others.discard(key)
+            for other_key in others:
+                other = self.sentences[other_key]
+
+                # Subtract the smaller sentence from the larger one
+                if key < other_key:
+                    new_cells = other_key - key
+                    new_count = other.count - sentence.count
+                elif other_key < key:
+                    new_cells = key - other_key
+                    new_count = sentence.count - other.count
+                else:
+                    continue
+                self.insert(Sentence(new_cells, new_count))
 
     def new_sentence(self, cell, count):
         """
@@ -255,31 +323,7 @@ class MinesweeperAI():
                     count -= 1
                     continue
                 cells.add((i, j))
-        self.knowledge.append(Sentence(cells, count))
-
-    def safe_fields_and_mines_check(self):
-        """
-        Mark any additional cells as safe or as mines if it can be
-        concluded based on the AI's knowledge base. Return true if
-        new mines have been found, else false.
-        """
-        # Initially set new_data flag as false
-        new_data = False
-
-        # Look for safe cells
-        for sentence in self.knowledge:
-            for safe_cell in sentence.known_safes().copy():
-                self.mark_safe(safe_cell)
-
-        # Look for mine cells
-        for sentence in self.knowledge:
-            new_mines = sentence.known_mines().copy()
-            if new_mines:
-                new_data = True
-            for mine_cell in new_mines:
-                self.mark_mine(mine_cell)
-
-        return new_data
+        self.insert(Sentence(cells, count))
 
     def make_safe_move(self):
         """
@@ -290,11 +334,8 @@ class MinesweeperAI():
         This function may use the knowledge in self.mines, self.safes
         and self.moves_made, but should not modify any of those values.
         """
-        # Get set of available moves
-        save_moves = self.safes - self.moves_made
-
         # Return arbitrary safe move if the one exist else None
-        return save_moves.pop() if save_moves else None
+        return next(iter(self.safe_moves), None)
 
     def make_random_move(self):
         """
@@ -312,3 +353,27 @@ class MinesweeperAI():
 
         # Return arbitrary move if the one exist else None
         return available_moves.pop() if available_moves else None
+
+    def make_guess(self):
+        """
+        Returns the cell least likely to be a mine among those not
+        chosen yet and not known to be mines or safe, or None.
+        """
+        unknown = [(i, j) for i in range(self.height)
+                   for j in range(self.width)
+                   if (i, j) not in self.moves_made
+                   and (i, j) not in self.mines
+                   and (i, j) not in self.safes]
+        if not unknown:
+            return None
+
+        mines_left = None
+        if self.total_mines is not None:
+            mines_left = self.total_mines - len(self.mines)
+        sentences = [(cells, sentence.count)
+                     for cells, sentence in self.sentences.items()]
+        chances = probability.mine_probabilities(
+            sentences, unknown, mines_left)
+
+        # Keep the first of equally likely cells
+        return min(unknown, key=lambda cell: chances[cell])
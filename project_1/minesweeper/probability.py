@@ -0,0 +1,255 @@
+"""
+Mine probabilities for Minesweeper guesses.
+
+The cells mentioned by the AI's sentences form the frontier. Cells
+linked by sentences are split into independent components. Every
+component's consistent mine assignments are counted by backtracking,
+grouped by their number of mines. The counts are combined so that
+each way to fill the frontier is weighted by the number of ways to
+place the remaining mines in the unconstrained cells. That gives the
+exact probability that each unknown cell is a mine.
+
+Components that take more than MAX_NODES backtracking steps are
+estimated from SAMPLES randomized searches instead.
+"""
+
+import math
+import random
+
+# Backtracking steps allowed for one component
+MAX_NODES = 100_000
+
+# Randomized searches used for a component that is too large
+SAMPLES = 200
+
+# Chance of a mine assumed when the number of mines is not known
+PRIOR_DENSITY = 0.125
+
+
+class Component():
+    """
+    Cells linked by sentences, and the counts of their consistent
+    mine assignments by number of mines.
+    """
+
+    def __init__(self, cells, constraints):
+        self.cells = cells
+        self.constraints = constraints
+
+        # Constraints mentioning every cell, by position in cells
+        position = {cell: i for i, cell in enumerate(cells)}
+        self.cell_constraints = [[] for _ in cells]
+        for index, (members, _) in enumerate(constraints):
+            for cell in members:
+                self.cell_constraints[position[cell]].append(index)
+
+        # Maps a number of mines to [assignments, mines per cell]
+        self.counts = {}
+        self.exact = True
+
+    def record(self, values, weight=1):
+        mines = sum(values)
+        entry = self.counts.get(mines)
+        if entry is None:
+            entry = self.counts[mines] = [0, [0] * len(self.cells)]
+        entry[0] += weight
+        cell_mines = entry[1]
+        for i, value in enumerate(values):
+            if value:
+                cell_mines[i] += weight
+
+    def search(self, limit, rng=None, solutions=None):
+        """
+        Records the consistent assignments found by backtracking,
+        trying values in random order if rng is given and stopping
+        after the given number of solutions.
+
+        Returns False if the search took more than limit steps.
+        """
+        n = len(self.cells)
+        cell_constraints = self.cell_constraints
+        need = [count for _, count in self.constraints]
+        left = [len(members) for members, _ in self.constraints]
+
+        def apply(i, value, sign):
+            """Assigns (sign 1) or unassigns (sign -1) a value."""
+            consistent = True
+            for index in cell_constraints[i]:
+                left[index] -= sign
+                need[index] -= sign * value
+                if not 0 <= need[index] <= left[index]:
+                    consistent = False
+            return consistent
+
+        values = [None] * n
+        tried = [0] * (n + 1)
+        first = [0] * (n + 1)
+        if rng is not None:
+            first[0] = rng.randrange(2)
+        found = 0
+        steps = 0
+        i = 0
+        while i >= 0:
+            if i == n:
+                self.record(values)
+                found += 1
+                if solutions is not None and found >= solutions:
+                    return True
+                i -= 1
+                continue
+
+            # Coming back to a cell, take back its value
+            if values[i] is not None:
+                apply(i, values[i], -1)
+                values[i] = None
+            if tried[i] == 2:
+                i -= 1
+                continue
+
+            value = first[i] ^ tried[i]
+            tried[i] += 1
+            steps += 1
+            if steps > limit:
+                return False
+            if apply(i, value, 1):
+                values[i] = value
+                i += 1
+                tried[i] = 0
+                if rng is not None:
+                    first[i] = rng.randrange(2)
+            else:
+                apply(i, value, -1)
+        return True
+
+    def solve(self, rng):
+        """
+        Counts the assignments exactly, or estimates them from
+        random solutions if that takes too long.
+        """
+        if self.search(MAX_NODES):
+            return
+        self.counts = {}
+        self.exact = False
+        limit = max(MAX_NODES // SAMPLES, 10 * len(self.cells))
+        for _ in range(SAMPLES):
+            self.search(limit, rng, solutions=1)
+
+
+def components(sentences):
+    """
+    Splits sentences, given as (cells, count) pairs,
+    into Components of the cells they link.
+    """
+    parent = {}
+
+    def find(cell):
+        while parent[cell] != cell:
+            parent[cell] = parent[parent[cell]]
+            cell = parent[cell]
+        return cell
+
+    for cells, _ in sentences:
+        cells = list(cells)
+        for cell in cells:
+            parent.setdefault(cell, cell)
+        for cell in cells[1:]:
+            a, b = find(cells[0]), find(cell)
+            if a != b:
+                parent[b] = a
+
+    groups = {}
+    for cells, count in sentences:
+        if cells:
+            root = find(next(iter(cells)))
+            groups.setdefault(root, []).append((cells, count))
+
+    result = []
+    for constraints in groups.values():
+        cells = set()
+        for members, _ in constraints:
+            cells.update(members)
+        result.append(Component(sorted(cells), constraints))
+    return result
+
+
+def convolve(a, b):
+    """Returns the counts of mines in two independent parts together."""
+    result = {}
+    for mines_a, count_a in a.items():
+        for mines_b, count_b in b.items():
+            result[mines_a + mines_b] = \
+                result.get(mines_a + mines_b, 0) + count_a * count_b
+    return result
+
+
+def mine_probabilities(sentences, unknown, mines_left=None, rng=None):
+    """
+    Returns {cell: chance of a mine} for every unknown cell, given
+    sentences as (cells, count) pairs over unknown cells and the
+    number of mines among the unknown cells, if it is known.
+    """
+    rng = rng or random.Random(0)
+    parts = components(sentences)
+    for part in parts:
+        part.solve(rng)
+    frontier = set()
+    for part in parts:
+        frontier.update(part.cells)
+    outside = len(set(unknown) - frontier)
+
+    # Weight of filling the frontier with some number of mines
+    if mines_left is None:
+        odds = PRIOR_DENSITY / (1 - PRIOR_DENSITY)
+
+        def weight(mines):
+            return odds ** mines
+    else:
+        def weight(mines):
+            rest = mines_left - mines
+            if rest < 0 or rest > outside:
+                return 0
+            return math.comb(outside, rest)
+
+    # Mine counts of the parts before and after every part
+    totals = [{mines: entry[0] for mines, entry in part.counts.items()}
+              for part in parts]
+    before = [{0: 1}]
+    for total in totals:
+        before.append(convolve(before[-1], total))
+    after = [{0: 1}]
+    for total in reversed(totals):
+        after.append(convolve(after[-1], total))
+    after.reverse()
+
+    everything = before[-1]
+    normalizer = sum(count * weight(mines)
+                     for mines, count in everything.items())
+    if not normalizer:
+        return {cell: 0.5 for cell in unknown}
+
+    probabilities = {}
+    for i, part in enumerate(parts):
+        others = convolve(before[i], after[i + 1])
+        for mines, (_, cell_mines) in part.counts.items():
+            ways = sum(count * weight(mines + other)
+                       for other, count in others.items())
+            if not ways:
+                continue
+            for cell, count in zip(part.cells, cell_mines):
+                probabilities[cell] = probabilities.get(cell, 0) + \
+                    count * ways
+        for cell in part.cells:
+            probabilities[cell] = probabilities.get(cell, 0) / normalizer
+
+    # Every unconstrained cell has the same chance
+    if outside:
+        if mines_left is None:
+            chance = PRIOR_DENSITY
+        else:
+            expected = sum(count * weight(mines) * (mines_left - mines)
+                           for mines, count in everything.items())
+            chance = expected / normalizer / outside
+        for cell in unknown:
+            if cell not in frontier:
+                probabilities[cell] = chance
+    return probabilities
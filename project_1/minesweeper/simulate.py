@@ -0,0 +1,127 @@
+"""
+Headless Minesweeper simulator.
+
+Plays seeded games of the AI on every board configuration in a pool
+of worker processes and reports the win rate, the moves made per
+second and the time add_knowledge takes per move. Game i of a board
+uses seed i, so runs are reproducible and can be compared.
+
+Usage: python simulate.py [-n GAMES] [-b HxWxMINES ...]
+                          [--guess {best,random}] [--workers N]
+"""
+
+import argparse
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from minesweeper import Minesweeper, MinesweeperAI
+
+# Boards played when none are given, as (height, width, mines)
+BOARDS = [(8, 8, 8), (9, 9, 10), (16, 16, 40), (16, 30, 99)]
+
+
+def play(height, width, mines, seed, guess="best"):
+    """
+    Plays one game with the AI until it hits a mine or has revealed
+    every safe cell.
+
+    Returns (won, moves, seconds in add_knowledge, seconds in total).
+    """
+    random.seed(seed)
+    game = Minesweeper(height=height, width=width, mines=mines)
+    ai = MinesweeperAI(height=height, width=width, mines=mines)
+    safe_cells = height * width - mines
+
+    knowledge_time = 0
+    start = time.perf_counter()
+    while len(ai.moves_made) < safe_cells:
+        move = ai.make_safe_move()
+        if move is None:
+            if guess == "best":
+                move = ai.make_guess()
+            else:
+                move = ai.make_random_move()
+            if move is None:
+                break
+        if game.is_mine(move):
+            break
+        nearby = game.nearby_mines(move)
+        before = time.perf_counter()
+        ai.add_knowledge(move, nearby)
+        knowledge_time += time.perf_counter() - before
+
+    won = len(ai.moves_made) == safe_cells
+    return won, len(ai.moves_made), knowledge_time, \
+        time.perf_counter() - start
+
+
+def play_task(task):
+    return play(*task)
+
+
+def simulate(boards, games, guess="best", workers=None):
+    """
+    Plays games on every board in a process pool. Returns a list
+    of (board, results) with the results of play in seed order.
+    """
+    tasks = [(height, width, mines, seed, guess)
+             for height, width, mines in boards
+             for seed in range(games)]
+    workers = workers or os.cpu_count() or 1
+    chunksize = max(1, len(tasks) // (4 * workers))
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        results = list(executor.map(play_task, tasks, chunksize=chunksize))
+    return [(board, results[i * games:(i + 1) * games])
+            for i, board in enumerate(boards)]
+
+
+def report(board, results):
+    """Returns a line summarizing the games played on a board."""
+    height, width, mines = board
+    wins = sum(1 for won, _, _, _ in results if won)
+    moves = sum(moves for _, moves, _, _ in results)
+    knowledge_time = sum(seconds for _, _, seconds, _ in results)
+    total_time = sum(seconds for _, _, _, seconds in results)
+    name = f"{height}x{width}x{mines}"
+    return (f"{name:>12}  {len(results):6}  {wins / len(results):8.1%}  "
+            f"{moves / total_time if total_time else 0:10.0f}  "
+            f"{1000 * knowledge_time / moves if moves else 0:12.3f}")
+
+
+def parse_board(text):
+    """Parses a board given as HxWxMINES."""
+    try:
+        height, width, mines = (int(part) for part in text.split("x"))
+    except ValueError:
+        raise argparse.ArgumentTypeError("boards look like 8x8x8")
+    if height < 1 or width < 1 or not 0 <= mines < height * width:
+        raise argparse.ArgumentTypeError(f"no room for mines in {text}")
+    return height, width, mines
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Play Minesweeper games with the AI, without a window.")
+    parser.add_argument("-n", "--games", type=int, default=100,
+                        help="games per board")
+    parser.add_argument("-b", "--board", type=parse_board, action="append",
+                        help="board as HxWxMINES, can be repeated")
+    parser.add_argument("--guess", choices=["best", "random"],
+                        default="best",
+                        help="how to move when no cell is known to be safe")
+    parser.add_argument("--workers", type=int,
+                        help="worker processes, all CPUs by default")
+    arguments = parser.parse_args()
+
+    boards = arguments.board or BOARDS
+    print(f"{'board':>12}  {'games':>6}  {'won':>8}  {'moves/s':>10}  "
+          f"{'knowledge ms':>12}")
+    for board, results in simulate(boards, arguments.games,
+                                   arguments.guess, arguments.workers):
+        print(report(board, results))
+
+
+if __name__ == "__main__":
+    main()